@@ -0,0 +1,536 @@
+# benchmarks.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Timing comparisons for the planners and game engine pieces in this project.
+Run one benchmark by name, for example:
+
+> python benchmarks.py foodTours -l bigSearch
+
+Use 'python benchmarks.py -h' to list the available benchmarks.
+"""
+import sys, time, random
+import layout, pacman, util
+
+def loadState(layoutName, numGhosts=0):
+    "Returns the starting GameState for a layout name (see layout.getLayout)."
+    lay = layout.getLayout(layoutName)
+    if lay == None: raise Exception("The layout " + layoutName + " cannot be found")
+    return stateForLayout(lay, numGhosts)
+
+def timed(function, *args):
+    "Returns (result, seconds) for function(*args), with the function's printing muted."
+    util.mutePrint()
+    try:
+        start = time.time()
+        result = function(*args)
+        return result, time.time() - start
+    finally:
+        util.unmutePrint()
+
+def benchmarkFoodTours(options):
+    "Path cost and planning time of ApproximateSearchAgent versus ClosestDotSearchAgent."
+    import searchAgents
+    layoutName = options.layout or 'bigSearch'
+    state = loadState(layoutName)
+    print 'Layout %s, %d dots' % (layoutName, state.getNumFood())
+    closest = searchAgents.ClosestDotSearchAgent()
+    result, seconds = timed(closest.registerInitialState, state)
+    print '  %-24s cost %4d  planning %6.3fs' % ('ClosestDotSearchAgent', len(closest.actions), seconds)
+    for timeLimit in [0.1, 0.5, 1.0, 3.0]:
+        approximate = searchAgents.ApproximateSearchAgent(timeLimit=timeLimit)
+        result, seconds = timed(approximate.registerInitialState, state)
+        name = 'ApproximateSearchAgent'
+        print '  %-24s cost %4d  planning %6.3fs  (timeLimit %.1fs)' % (name, len(approximate.actions), seconds, timeLimit)
+
+def benchmarkLegalActions(options):
+    "Legal-action lookups through the per-layout LegalActionTable versus the general code."
+    import timeit
+    from game import Actions, Configuration, Directions
+    layoutName = options.layout or 'mediumClassic'
+    state = loadState(layoutName, numGhosts=1)
+    walls = state.getWalls()
+    unfrozen = walls.copy()
+    x, y = state.getGhostPosition(1)
+    configuration = Configuration((x, y), Directions.WEST)
+    print 'Layout %s (microseconds per call)' % layoutName
+    print '  %-32s %8s %8s' % ('', 'general', 'table')
+    def ghostActions(walls):
+        # GhostRules.getLegalActions for a ghost heading West at (x, y)
+        actions = Actions.getPossibleActions(configuration, walls)
+        if Directions.STOP in actions: actions.remove(Directions.STOP)
+        if Directions.EAST in actions and len(actions) > 1: actions.remove(Directions.EAST)
+        return actions
+
+    table = Actions.getActionTable(walls)
+    for name, function in [('Actions.getPossibleActions', lambda walls: Actions.getPossibleActions(configuration, walls)),
+                           ('Actions.getLegalNeighbors', lambda walls: Actions.getLegalNeighbors((x, y), walls)),
+                           ('ghost legal actions', ghostActions)]:
+        general = min(timeit.Timer(lambda: function(unfrozen)).repeat(3, 20000)) / 20000 * 1e6
+        if name == 'ghost legal actions':
+            function = lambda walls: list(table.ghostActions[(x, y)][Directions.WEST])
+        tabled = min(timeit.Timer(lambda: function(walls)).repeat(3, 20000)) / 20000 * 1e6
+        print '  %-32s %8.2f %8.2f' % (name, general, tabled)
+
+def benchmarkLandmarks(options):
+    "Memory and A* expansions of ALT landmark heuristics versus manhattanHeuristic."
+    import search, searchAgents, mazeGraph
+    layoutName = options.layout or 'bigMaze'
+    state = loadState(layoutName)
+    walls = state.getWalls()
+    graph = mazeGraph.getMazeGraph(walls)
+    openCells = [graph.position(cell) for cell in graph.openCells()]
+    rand = random.Random(0)
+    queries = [(state.getPacmanPosition(), (1, 1))] + [tuple(rand.sample(openCells, 2)) for i in range(20)]
+    print 'Layout %s, %d open cells, %d queries; all-pairs matrix would take %d KB' % \
+        (layoutName, len(openCells), len(queries), len(openCells) ** 2 * 8 / 1024)
+
+    def run(name, heuristic, memory):
+        expanded = 0
+        start = time.time()
+        for source, goal in queries:
+            problem = searchAgents.PositionSearchProblem(state, start=source, goal=goal, warn=False, visualize=False)
+            search.astar(problem, heuristic)
+            expanded += problem._expanded
+        print '  %-26s %6d expanded  %6.3fs  %5d KB' % (name, expanded, time.time() - start, memory / 1024)
+
+    run('manhattanHeuristic', searchAgents.manhattanHeuristic, 0)
+    for selection in ['farthest', 'avoid']:
+        for numLandmarks in [4, 8, 16]:
+            table, seconds = timed(mazeGraph.getLandmarkTable, walls, numLandmarks, selection)
+            heuristic = lambda position, problem: max(table.lowerBound(graph.cell(position), graph.cell(problem.goal)),
+                                                      searchAgents.manhattanHeuristic(position, problem))
+            run('ALT %s k=%d' % (selection, numLandmarks), heuristic, table.memoryBytes())
+
+def benchmarkContraction(options):
+    "Query latency of contraction hierarchy distances and paths versus search.bfs."
+    import search, searchAgents, mazeGraph, contractionHierarchy
+    layoutName = options.layout or 'bigMaze'
+    state = loadState(layoutName)
+    walls = state.getWalls()
+    graph = mazeGraph.getMazeGraph(walls)
+    openCells = [graph.position(cell) for cell in graph.openCells()]
+    hierarchy, seconds = timed(contractionHierarchy.ContractionHierarchy, graph)
+    upEdges = sum([len(edges) for edges in hierarchy.up.values()])
+    print 'Layout %s, %d open cells' % (layoutName, len(openCells))
+    print '  preprocessing %.3fs, %d shortcuts, %d upward edges' % (seconds, hierarchy.numShortcuts, upEdges)
+
+    rand = random.Random(0)
+    queries = [tuple(rand.sample(openCells, 2)) for i in range(200)]
+    start = time.time()
+    bfsLengths = []
+    for source, goal in queries:
+        problem = searchAgents.PositionSearchProblem(state, start=source, goal=goal, warn=False, visualize=False)
+        bfsLengths.append(len(search.bfs(problem)))
+    bfsTime = (time.time() - start) / len(queries)
+    start = time.time()
+    distances = [hierarchy.distance(source, goal) for source, goal in queries]
+    distanceTime = (time.time() - start) / len(queries)
+    start = time.time()
+    paths = [hierarchy.path(source, goal) for source, goal in queries]
+    pathTime = (time.time() - start) / len(queries)
+    for (source, goal), path in zip(queries, paths):
+        problem = searchAgents.PositionSearchProblem(state, start=source, goal=goal, warn=False, visualize=False)
+        assert problem.getCostOfActions(path) == len(path) and problem.isGoalState(followPath(source, path))
+    agree = distances == bfsLengths and [len(path) for path in paths] == bfsLengths
+    print '  search.bfs         %8.3f ms/query' % (bfsTime * 1000)
+    print '  hierarchy distance %8.3f ms/query' % (distanceTime * 1000)
+    print '  hierarchy path     %8.3f ms/query' % (pathTime * 1000)
+    print '  %d queries, distances %s bfs' % (len(queries), agree and 'match' or 'DO NOT match')
+
+def benchmarkExplored(options):
+    "Successor generation with each GameState.explored tracker, and the states each keeps alive."
+    import gc
+    layoutName = options.layout or 'mediumClassic'
+    state = loadState(layoutName, numGhosts=2)
+    numAgents = state.getNumAgents()
+    print 'Layout %s, random playouts of 200 moves from the start' % layoutName
+
+    def playouts():
+        rand = random.Random(0)
+        for i in range(200):
+            current = state
+            for move in range(200):
+                if current.isWin() or current.isLose(): break
+                agentIndex = move % numAgents
+                current = current.generateSuccessor(agentIndex, rand.choice(current.getLegalActions(agentIndex)))
+
+    default = pacman.GameState.explored
+    for name, tracker in [('count', pacman.ExploredCounter()), ('capacity 1000', pacman.ExploredStates(1000)),
+                          ('all', pacman.ExploredStates())]:
+        pacman.GameState.trackExplored(tracker)
+        gc.collect()
+        before = len(gc.get_objects())
+        result, seconds = timed(playouts)
+        gc.collect()
+        held = len(gc.get_objects()) - before
+        print '  %-14s %d successors in %.3fs, %d states kept, %d objects still alive' % \
+            (name, tracker.successors, seconds, len(getattr(tracker, 'states', ())), held)
+        pacman.GameState.getAndResetExplored()
+    pacman.GameState.trackExplored(default)
+
+def benchmarkFoodHeuristics(options):
+    "Build time, memory and A* expansions of food pattern databases versus foodHeuristic."
+    import search, searchAgents
+    layoutName = options.layout or 'trickySearch'
+    state = loadState(layoutName)
+    print 'Layout %s, %d dots' % (layoutName, state.getNumFood())
+
+    def run(name, heuristic, seconds, memory):
+        problem = searchAgents.FoodSearchProblem(state)
+        actions, searchSeconds = timed(search.astar, problem, heuristic)
+        print '  %-22s cost %3d  %6d expanded  search %6.2fs  build %6.3fs  %5d KB' % \
+            (name, problem.getCostOfActions(actions), problem._expanded, searchSeconds, seconds, memory / 1024)
+
+    run('foodHeuristic', searchAgents.foodHeuristic, 0, 0)
+    for groupSize in [2, 4, 6, 8, 10]:
+        database, seconds = timed(searchAgents.FoodPatternDatabase, state.getWalls(), state.getFood(), groupSize)
+        heuristic = lambda searchState, problem: database.lowerBound(searchState[0], searchState[1])
+        run('pattern database, %d' % groupSize, heuristic, seconds, database.memoryBytes())
+
+def benchmarkDistances(options):
+    "Batch maze-distance queries versus one searchAgents.mazeDistance call per pair."
+    import searchAgents, mazeGraph
+    layoutName = options.layout or 'bigSearch'
+    state = loadState(layoutName)
+    graph = mazeGraph.getMazeGraph(state.getWalls())
+    start, food = state.getPacmanPosition(), state.getFood().asList()
+    print 'Layout %s, %d dots, NumPy %s' % (layoutName, len(food), mazeGraph.numpy and 'installed' or 'not installed')
+
+    def compare(name, pairwise, batch):
+        expected, pairSeconds = timed(pairwise)
+        result, batchSeconds = timed(batch)
+        same = [list(row) for row in expected] == [list(row) for row in result]
+        print '  %-26s pairwise %8.3fs  batch %8.4fs  %s' % (name, pairSeconds, batchSeconds, same and 'same' or 'DIFFERENT')
+
+    compare('pacman to all food',
+            lambda: [[searchAgents.mazeDistance(start, dot, state) for dot in food]],
+            lambda: graph.distances([start], food))
+    sample = food[:20]
+    compare('20 dots to nearest other',
+            lambda: [[min([searchAgents.mazeDistance(a, b, state) for b in sample if b != a]) for a in sample]],
+            lambda: [graph.nearestNeighborDistances(sample)])
+    compare('20 x 20 dots',
+            lambda: [[searchAgents.mazeDistance(a, b, state) for b in sample] for a in sample],
+            lambda: graph.distances(sample, sample))
+
+def benchmarkGrids(options):
+    "Microbenchmarks of each Grid operation for the list-of-lists Grid and the int-backed BitGrid."
+    import timeit
+    from game import Grid, BitGrid
+    layoutName = options.layout or 'bigSearch'
+    food = loadState(layoutName).getFood()
+    grids = [('Grid', Grid(food.width, food.height)), ('BitGrid', BitGrid(food.width, food.height))]
+    for name, grid in grids:
+        for x, y in food.asList(): grid[x][y] = True
+    print 'Layout %s, %d x %d, %d dots (microseconds per call)' % (layoutName, food.width, food.height, food.count())
+    operations = [('grid[x][y]', lambda grid, other: grid[5][3]),
+                  ('grid[x][y] = v', lambda grid, other: grid[5].__setitem__(3, True)),
+                  ('count', lambda grid, other: grid.count()),
+                  ('copy', lambda grid, other: grid.copy()),
+                  ('hash', lambda grid, other: hash(grid)),
+                  ('==', lambda grid, other: grid == other),
+                  ('asList', lambda grid, other: grid.asList()),
+                  ('packBits', lambda grid, other: grid.packBits())]
+    print '  %-16s' % '' + ''.join(['%10s' % name for name, grid in grids])
+    for operation, function in operations:
+        times = []
+        for name, grid in grids:
+            other = grid.copy()
+            number = 2000
+            seconds = min(timeit.Timer(lambda: function(grid, other)).repeat(3, number))
+            times.append(seconds / number * 1e6)
+        print '  %-16s' % operation + ''.join(['%10.2f' % t for t in times])
+
+def benchmarkHierarchical(options):
+    """
+    Query time and path quality of HPA* versus flat A* on a large generated
+    maze (or a layout given with -l), and the cost of changing one wall.
+    """
+    import search, searchAgents, hierarchicalSearch
+    if options.layout:
+        layoutName = options.layout
+        state = loadState(layoutName)
+    else:
+        layoutName = 'generated 151x151 maze'
+        state = stateForLayout(generateMaze(151, 151))
+    walls = state.getWalls()
+    openCells = walls.asList(False)
+    hierarchy, seconds = timed(hierarchicalSearch.HierarchicalMap, walls)
+    print 'Layout %s, %d open cells' % (layoutName, len(openCells))
+    print '  preprocessing %.3fs, %d clusters, %d entrance cells' % \
+        (seconds, hierarchy.clustersX * hierarchy.clustersY, hierarchy.numNodes())
+
+    rand = random.Random(0)
+    queries = [tuple(rand.sample(openCells, 2)) for i in range(20)]
+    start = time.time()
+    optimal = []
+    for source, goal in queries:
+        problem = searchAgents.PositionSearchProblem(state, start=source, goal=goal, warn=False, visualize=False)
+        optimal.append(len(search.astar(problem, searchAgents.manhattanHeuristic)))
+    flatTime = (time.time() - start) / len(queries)
+    start = time.time()
+    abstract = [hierarchy.abstractPath(source, goal) for source, goal in queries]
+    abstractTime = (time.time() - start) / len(queries)
+    start = time.time()
+    paths = [hierarchy.findPath(source, goal) for source, goal in queries]
+    refinedTime = (time.time() - start) / len(queries)
+    for (source, goal), path in zip(queries, paths):
+        assert followPath(source, path) == goal
+    excess = float(sum([len(path) for path in paths])) / sum(optimal) - 1
+    print '  flat astar         %8.3f ms/query' % (flatTime * 1000)
+    print '  abstract path      %8.3f ms/query' % (abstractTime * 1000)
+    print '  refined path       %8.3f ms/query' % (refinedTime * 1000)
+    print '  paths %.1f%% longer than optimal' % (excess * 100)
+
+    start = time.time()
+    rebuilt = 0
+    for i in range(100):
+        position = rand.choice(openCells)
+        rebuilt += len(hierarchy.setWall(position, True))
+        rebuilt += len(hierarchy.setWall(position, False))
+    wallTime = (time.time() - start) / 200
+    print '  setWall %.3f ms, %.2f clusters rebuilt per change (full rebuild %.3fs)' % \
+        (wallTime * 1000, rebuilt / 200.0, seconds)
+
+def benchmarkMoves(options):
+    """
+    Moves per second of whole games, a GreedyAgent against RandomGhosts with
+    no display, with agents given deep copies or read-only views of the state.
+    """
+    import pacmanAgents, ghostAgents, textDisplay
+    layoutName = options.layout or 'mediumClassic'
+    lay = layout.getLayout(layoutName)
+    rules = pacman.ClassicGameRules()
+    print 'Layout %s, %d ghosts, 10 games' % (layoutName, lay.getNumGhosts())
+    for readOnlyObservations in [False, True]:
+        random.seed(0)
+        moves, seconds = 0, 0.0
+        for i in range(10):
+            ghosts = [ghostAgents.RandomGhost(index) for index in range(1, lay.getNumGhosts() + 1)]
+            game = rules.newGame(lay, pacmanAgents.GreedyAgent(), ghosts, textDisplay.NullGraphics(), True,
+                                 readOnlyObservations=readOnlyObservations)
+            result, gameSeconds = timed(game.run)
+            moves += len(game.moveHistory)
+            seconds += gameSeconds
+        name = readOnlyObservations and 'read-only views' or 'deep copies'
+        print '  %-16s %d moves in %.2fs (%d moves per second)' % (name, moves, seconds, moves / seconds)
+    import timeit
+    state = game.state
+    for name, observe in [('deepCopy', state.deepCopy), ('readOnlyView', state.readOnlyView)]:
+        print '  one %-12s %6.2f microseconds' % (name, min(timeit.Timer(observe).repeat(3, 10000)) / 10000 * 1e6)
+
+def benchmarkSuccessors(options):
+    "Speed of GameState.generateSuccessor and the objects held by the states it returns."
+    import gc
+    from game import AgentState, Configuration, Grid
+    layoutName = options.layout or 'mediumClassic'
+    state = loadState(layoutName, numGhosts=2)
+    numAgents = state.getNumAgents()
+    depth = 4 * numAgents
+    print 'Layout %s, %d agents, every successor %d moves deep' % (layoutName, numAgents, depth)
+
+    def expand():
+        states, frontier = [], [state]
+        for ply in range(depth):
+            agentIndex = ply % numAgents
+            nextFrontier = []
+            for parent in frontier:
+                if parent.isWin() or parent.isLose(): continue
+                for action in parent.getLegalActions(agentIndex):
+                    nextFrontier.append(parent.generateSuccessor(agentIndex, action))
+            states += nextFrontier
+            frontier = nextFrontier
+        return states
+
+    pacman.GameState.getAndResetExplored()
+    gc.collect()
+    before = len(gc.get_objects())
+    states, seconds = timed(expand)
+    newObjects = len(gc.get_objects()) - before
+    counts = {AgentState: 0, Configuration: 0, Grid: 0}
+    agentBytes = 0
+    for o in gc.get_objects():
+        for kind in counts:
+            if isinstance(o, kind):
+                counts[kind] += 1
+                if kind != Grid:
+                    agentBytes += sys.getsizeof(o)
+                    if getattr(o, '__dict__', None) != None: agentBytes += sys.getsizeof(o.__dict__)
+    print '  %d successors in %.3fs (%d per second)' % (len(states), seconds, len(states) / seconds)
+    distinct, hashSeconds = timed(lambda: len(set(states)))
+    print '  %d distinct states; putting them all in a set took %.3fs' % (distinct, hashSeconds)
+    print '  %d AgentStates, %d Configurations (%d KB together) and %d Grids held' % \
+        (counts[AgentState], counts[Configuration], agentBytes / 1024, counts[Grid])
+    print '  %d new objects in all (%.1f per successor)' % (newObjects, float(newObjects) / len(states))
+
+def benchmarkPackedGame(options):
+    "Successors per second from GameState and from the packed tuple engine over the same tree."
+    import packedGame
+    layoutName = options.layout or 'mediumClassic'
+    state = loadState(layoutName, numGhosts=2)
+    engine = packedGame.PackedGame(state.data.layout, 2)
+    numAgents = state.getNumAgents()
+    depth = 4 * numAgents
+    print 'Layout %s, %d agents, every successor %d moves deep' % (layoutName, numAgents, depth)
+
+    def expand(start, isOver, getLegalActions, generateSuccessor):
+        count, frontier = 0, [start]
+        for ply in range(depth):
+            agentIndex = ply % numAgents
+            nextFrontier = []
+            for parent in frontier:
+                if isOver(parent): continue
+                for action in getLegalActions(parent, agentIndex):
+                    nextFrontier.append(generateSuccessor(parent, agentIndex, action))
+            count += len(nextFrontier)
+            frontier = nextFrontier
+        return count
+
+    gameStateOver = lambda s: s.isWin() or s.isLose()
+    packedOver = lambda s: s[6] != packedGame.PLAYING
+    pacman.GameState.getAndResetExplored()
+    for name, start, isOver, getLegalActions, generateSuccessor in [
+            ('GameState', state, gameStateOver, pacman.GameState.getLegalActions, pacman.GameState.generateSuccessor),
+            ('PackedGame', engine.getStartState(), packedOver, engine.getLegalActions, engine.generateSuccessor)]:
+        count, seconds = timed(expand, start, isOver, getLegalActions, generateSuccessor)
+        print '  %-10s %d successors in %.3fs (%d per second)' % (name, count, seconds, count / seconds)
+    pacman.GameState.getAndResetExplored()
+    moves, seconds = timed(packedGame.verifyAgainstGameState, state.data.layout, 2, 5)
+    print '  verified %d moves of random games against GameState in %.2fs' % (moves, seconds)
+
+def benchmarkSuccessorCache(options):
+    """
+    An iterative-deepening game-tree search repeated over the moves of a
+    game, as minimax and expectimax agents do, with and without a
+    SuccessorCache; the trees must come out identical.
+    """
+    layoutName = options.layout or 'mediumClassic'
+    start = loadState(layoutName, numGhosts=2)
+    numAgents = start.getNumAgents()
+    maxDepth = 2 * numAgents
+    print 'Layout %s, %d agents, searching 1 to %d plies deep at each of 10 moves' % (layoutName, numAgents, maxDepth)
+
+    def search():
+        rand = random.Random(0)
+        state, leaves = start, []
+        for move in range(10):
+            for depth in range(1, maxDepth + 1):
+                frontier = [state]
+                for ply in range(depth):
+                    agentIndex = ply % numAgents
+                    nextFrontier = []
+                    for parent in frontier:
+                        if parent.isWin() or parent.isLose(): continue
+                        for action in parent.getLegalActions(agentIndex):
+                            nextFrontier.append(parent.generateSuccessor(agentIndex, action))
+                    frontier = nextFrontier
+                leaves.append(frontier)
+            for agentIndex in range(numAgents):
+                if state.isWin() or state.isLose(): break
+                state = state.generateSuccessor(agentIndex, rand.choice(state.getLegalActions(agentIndex)))
+        return leaves
+
+    plain, plainSeconds = timed(search)
+    print '  no cache       %.3fs' % plainSeconds
+    for capacity in [1000, 100000]:
+        cache = pacman.SuccessorCache(capacity)
+        pacman.GameState.useSuccessorCache(cache)
+        try:
+            cached, seconds = timed(search)
+        finally:
+            pacman.GameState.useSuccessorCache(None)
+        if cached != plain: raise Exception('The successor cache changed the search')
+        print '  capacity %-6d %.3fs, %s' % (capacity, seconds, cache)
+
+def generateMaze(width, height, seed=0, openings=0.03):
+    """
+    A random perfect maze (depth first backtracking) on odd coordinates, with
+    a fraction of the remaining walls knocked out to add loops.  Returns a
+    Layout with Pacman in the bottom left corner.
+    """
+    import layout
+    rand = random.Random(seed)
+    rows = [['%'] * width for y in range(height)]
+    rows[1][1] = ' '
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and rows[y + dy][x + dx] == '%']
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = rand.choice(options)
+        rows[y + dy // 2][x + dx // 2] = ' '
+        rows[y + dy][x + dx] = ' '
+        stack.append((x + dx, y + dy))
+    for i in range(int(openings * width * height)):
+        rows[rand.randrange(1, height - 1)][rand.randrange(1, width - 1)] = ' '
+    # Layout text is listed top row first, so row 1 here is the bottom row
+    rows[1][1] = 'P'
+    rows.reverse()
+    return layout.Layout([''.join(row) for row in rows])
+
+def stateForLayout(lay, numGhosts=0):
+    "Returns the starting GameState for a Layout."
+    state = pacman.GameState()
+    state.initialize(lay, numGhosts)
+    return state
+
+def followPath(position, actions):
+    "The position reached from position by a list of Directions."
+    from game import Actions
+    for action in actions:
+        position = Actions.getSuccessor(position, action)
+    return (int(position[0]), int(position[1]))
+
+BENCHMARKS = {
+    'contraction': benchmarkContraction,
+    'distances': benchmarkDistances,
+    'explored': benchmarkExplored,
+    'foodHeuristics': benchmarkFoodHeuristics,
+    'foodTours': benchmarkFoodTours,
+    'grids': benchmarkGrids,
+    'hierarchical': benchmarkHierarchical,
+    'landmarks': benchmarkLandmarks,
+    'legalActions': benchmarkLegalActions,
+    'moves': benchmarkMoves,
+    'packedGame': benchmarkPackedGame,
+    'successorCache': benchmarkSuccessorCache,
+    'successors': benchmarkSuccessors,
+}
+
+def readCommand(argv):
+    from optparse import OptionParser
+    usageStr = """
+    USAGE:      python benchmarks.py <benchmark> <options>
+    BENCHMARKS: %s
+    """ % ', '.join(sorted(BENCHMARKS.keys()))
+    parser = OptionParser(usageStr)
+    parser.add_option('-l', '--layout', dest='layout',
+                      help='the LAYOUT_FILE to benchmark on [Default: each benchmark picks one]',
+                      metavar='LAYOUT_FILE', default=None)
+    options, names = parser.parse_args(argv)
+    if len(names) == 0: names = sorted(BENCHMARKS.keys())
+    for name in names:
+        if name not in BENCHMARKS:
+            raise Exception('Unknown benchmark ' + name + '; choose from ' + ', '.join(sorted(BENCHMARKS.keys())))
+    return names, options
+
+if __name__ == '__main__':
+    names, options = readCommand(sys.argv[1:])
+    for name in names:
+        BENCHMARKS[name](options)
@@ -0,0 +1,205 @@
+# contractionHierarchy.py
+# -----------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Contraction hierarchies for fast point-to-point maze distances.
+
+Preprocessing contracts the open cells of a layout one at a time, in order
+of importance, adding a shortcut edge between two neighbors whenever the
+contracted cell was on their only shortest path.  A query then runs two
+small Dijkstra searches that only ever climb to more important cells, one
+from each end, and meets in the middle.  Shortcuts remember the cell they
+bypass, so paths unpack back into single Pacman moves.
+
+The hierarchy is built once per wall layout and shared through the
+layout's MazeGraph.  It is a drop-in for searchAgents.mazeDistance:
+
+  import contractionHierarchy
+  contractionHierarchy.mazeDistance((2,4), (5,6), gameState)
+"""
+import heapq
+import mazeGraph
+from mazeGraph import INFINITY
+
+class ContractionHierarchy:
+    """
+    A contraction hierarchy over the open cells of a MazeGraph.
+
+    rank[c] is the order in which cell c was contracted, up[c] lists the
+    (cell, weight) edges from c to more important cells, and middle maps a
+    shortcut (a, b) with a < b to the cell it bypasses.
+    """
+
+    def __init__(self, graph, witnessLimit=50):
+        self.graph = graph
+        self.witnessLimit = witnessLimit
+        cells = graph.openCells()
+        adjacent = {}
+        for cell in cells:
+            adjacent[cell] = dict([(nextCell, 1) for nextCell, action in graph.neighbors[cell]])
+        self.rank = {}
+        self.up = {}
+        self.middle = {}
+        self.numShortcuts = 0
+
+        deleted = dict([(cell, 0) for cell in cells])
+        heap = [(self._priority(cell, adjacent, deleted), cell) for cell in cells]
+        heapq.heapify(heap)
+        while heap:
+            priority, cell = heapq.heappop(heap)
+            # Lazy updates: re-check the priority before contracting
+            shortcuts = self._shortcuts(cell, adjacent)
+            priority = len(shortcuts) - len(adjacent[cell]) + deleted[cell]
+            if heap and priority > heap[0][0]:
+                heapq.heappush(heap, (priority, cell))
+                continue
+            self._contract(cell, shortcuts, adjacent, deleted)
+
+    def _priority(self, cell, adjacent, deleted):
+        "Edge difference plus the number of already contracted neighbors."
+        return len(self._shortcuts(cell, adjacent)) - len(adjacent[cell]) + deleted[cell]
+
+    def _contract(self, cell, shortcuts, adjacent, deleted):
+        self.rank[cell] = len(self.rank)
+        self.up[cell] = adjacent[cell].items()
+        for neighbor in adjacent[cell]:
+            del adjacent[neighbor][cell]
+            deleted[neighbor] += 1
+        for a, b, weight in shortcuts:
+            if weight < adjacent[a].get(b, INFINITY):
+                adjacent[a][b] = weight
+                adjacent[b][a] = weight
+                self.middle[(min(a, b), max(a, b))] = cell
+                self.numShortcuts += 1
+        del adjacent[cell]
+
+    def _shortcuts(self, cell, adjacent):
+        """
+        The (a, b, weight) shortcuts needed to contract cell: one for each pair
+        of its neighbors with no witness path of the same length avoiding it.
+        """
+        neighbors = adjacent[cell].items()
+        shortcuts = []
+        for i in range(len(neighbors)):
+            a, weightA = neighbors[i]
+            targets = dict([(b, weightA + weightB) for b, weightB in neighbors[i + 1:]])
+            if not targets: continue
+            dist = self._witnessSearch(a, cell, max(targets.values()), adjacent)
+            for b, weight in targets.items():
+                if dist.get(b, INFINITY) > weight:
+                    shortcuts.append((a, b, weight))
+        return shortcuts
+
+    def _witnessSearch(self, source, avoid, maxDistance, adjacent):
+        "A Dijkstra search from source that skips avoid and gives up early."
+        dist = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        while heap and settled < self.witnessLimit:
+            d, cell = heapq.heappop(heap)
+            if d > dist[cell]: continue
+            if d > maxDistance: break
+            settled += 1
+            for nextCell, weight in adjacent[cell].iteritems():
+                if nextCell == avoid: continue
+                if d + weight < dist.get(nextCell, INFINITY):
+                    dist[nextCell] = d + weight
+                    heapq.heappush(heap, (d + weight, nextCell))
+        return dist
+
+    def _upwardSearch(self, source):
+        "Dijkstra over the upward edges only; returns (dist, parent) dicts."
+        dist, parent = {source: 0}, {source: None}
+        heap = [(0, source)]
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if d > dist[cell]: continue
+            for nextCell, weight in self.up[cell]:
+                if d + weight < dist.get(nextCell, INFINITY):
+                    dist[nextCell] = d + weight
+                    parent[nextCell] = cell
+                    heapq.heappush(heap, (d + weight, nextCell))
+        return dist, parent
+
+    def _query(self, source, target):
+        "Returns (distance, meeting cell, forward parents, backward parents)."
+        if source not in self.rank or target not in self.rank:
+            return INFINITY, None, None, None
+        forward, forwardParent = self._upwardSearch(source)
+        backward, backwardParent = self._upwardSearch(target)
+        best, meet = INFINITY, None
+        for cell, d in forward.iteritems():
+            if cell in backward and d + backward[cell] < best:
+                best, meet = d + backward[cell], cell
+        return best, meet, forwardParent, backwardParent
+
+    def distance(self, position1, position2):
+        "The maze distance between two positions, or INFINITY if unreachable."
+        return self._query(self.graph.cell(position1), self.graph.cell(position2))[0]
+
+    def path(self, position1, position2):
+        "The list of Directions from position1 to position2, or None if unreachable."
+        best, meet, forwardParent, backwardParent = self._query(self.graph.cell(position1), self.graph.cell(position2))
+        if meet == None: return None
+        cells = []
+        cell = meet
+        while cell != None:
+            cells.append(cell)
+            cell = forwardParent[cell]
+        cells.reverse()
+        cell = backwardParent[meet]
+        while cell != None:
+            cells.append(cell)
+            cell = backwardParent[cell]
+
+        actions = []
+        for i in range(len(cells) - 1):
+            self._unpack(cells[i], cells[i + 1], actions)
+        return actions
+
+    def _unpack(self, a, b, actions):
+        "Appends the single moves along edge a -> b, expanding shortcuts."
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            key = (min(a, b), max(a, b))
+            if key in self.middle:
+                m = self.middle[key]
+                stack.append((m, b))
+                stack.append((a, m))
+            else:
+                for nextCell, action in self.graph.neighbors[a]:
+                    if nextCell == b:
+                        actions.append(action)
+                        break
+
+def getContractionHierarchy(walls):
+    "Returns the shared ContractionHierarchy for a wall Grid, building it on first use."
+    graph = mazeGraph.getMazeGraph(walls)
+    if 'contraction' not in graph.tables:
+        graph.tables['contraction'] = ContractionHierarchy(graph)
+    return graph.tables['contraction']
+
+def mazeDistance(point1, point2, gameState):
+    """
+    Returns the maze distance between two points, like searchAgents.mazeDistance,
+    but answered from the layout's contraction hierarchy.
+    """
+    walls = gameState.getWalls()
+    x1, y1 = point1
+    x2, y2 = point2
+    assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
+    assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
+    return getContractionHierarchy(walls).distance(point1, point2)
@@ -0,0 +1,307 @@
+# engineTests.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Unit tests for the game engine (layouts and game states), as opposed to
+the student search code, which autograder.py grades:
+
+> python engineTests.py
+"""
+import unittest, random
+import layout, pacman, textDisplay, packedGame
+from game import Directions, Configuration
+from pacmanAgents import GreedyAgent
+from ghostAgents import RandomGhost
+
+class LayoutTests(unittest.TestCase):
+    def testVisibilityMatrixOnInternedLayout(self):
+        lay = layout.getLayout('mediumClassic')
+        self.assert_(layout.getLayout('mediumClassic') is lay)
+        vis = lay.initializeVisibilityMatrix()
+        self.assert_(lay.initializeVisibilityMatrix() is vis)
+        self.assert_(lay.deepCopy().initializeVisibilityMatrix() is vis)
+        # Pacman starts at (9, 1) on the bottom corridor, between walls at x = 5 and 14
+        self.assert_(lay.isVisibleFrom((6, 1), (9, 1), Directions.WEST))
+        self.assert_(lay.isVisibleFrom((8.5, 1), (9, 1), Directions.WEST))
+        self.assert_(lay.isVisibleFrom((13, 1), (9, 1), Directions.EAST))
+        self.failIf(lay.isVisibleFrom((4, 1), (9, 1), Directions.WEST))
+        self.failIf(lay.isVisibleFrom((6, 1), (9, 1), Directions.EAST))
+        self.failIf(lay.isVisibleFrom((9, 3), (9, 1), Directions.NORTH))
+        self.assertRaises(AttributeError, setattr, lay, 'visibility', vis)
+
+class SharingTests(unittest.TestCase):
+    "Successors share data with their predecessor until either writes it."
+    def setUp(self):
+        self.state = pacman.GameState()
+        self.state.initialize(layout.getLayout('mediumClassic'), 2)
+
+    def testParentWritesDoNotReachSuccessor(self):
+        s = self.state
+        c = s.generateSuccessor(0, s.getLegalActions(0)[0])
+        food = c.getNumFood()
+        s.getGhostState(1).scaredTimer = 5
+        s.getGhostStates()[1].scaredTimer = 6
+        s.data.writableAgentState(0).scaredTimer = 7
+        s.data.writableCapsules().pop()
+        s.data.removeFood(s.getFood().asList()[0])
+        self.assertEqual(c.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(c.getGhostState(2).scaredTimer, 0)
+        self.assertEqual(c.getPacmanState().scaredTimer, 0)
+        self.assertEqual(len(c.getCapsules()), 2)
+        self.assertEqual(c.getNumFood(), food)
+
+    def testSuccessorWritesDoNotReachParentOrSibling(self):
+        s = self.state
+        before = s.deepCopy()
+        c = s.generateSuccessor(0, s.getLegalActions(0)[0])
+        d = s.generateSuccessor(0, s.getLegalActions(0)[-1])
+        c.getGhostState(1).scaredTimer = 3
+        c.data.writableCapsules().pop()
+        self.assertEqual(s, before)
+        self.assertEqual(d.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(len(d.getCapsules()), 2)
+
+    def testDeepCopiesAreIndependent(self):
+        s = self.state
+        copy = s.deepCopy()
+        c = copy.generateSuccessor(0, copy.getLegalActions(0)[0])
+        copy.getGhostState(1).scaredTimer = 5
+        copy.data.writableCapsules().pop()
+        self.assertEqual(c.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(s.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(len(c.getCapsules()), 2)
+        self.assertEqual(len(s.getCapsules()), 2)
+
+    def testAccessorsReturnCopies(self):
+        s = self.state
+        c = s.generateSuccessor(0, s.getLegalActions(0)[0])
+        s.getCapsules().pop()
+        x, y = s.getFood().asList()[0]
+        s.getFood()[x][y] = False
+        self.assertEqual(len(s.getCapsules()), 2)
+        self.assertEqual(len(c.getCapsules()), 2)
+        self.assert_(s.hasFood(x, y) and c.hasFood(x, y))
+
+class ExploredTests(unittest.TestCase):
+    def expand(self, tracker):
+        default = pacman.GameState.explored
+        pacman.GameState.trackExplored(tracker)
+        try:
+            s = pacman.GameState()
+            s.initialize(layout.getLayout('mediumClassic'), 2)
+            for action in s.getLegalActions(0) + s.getLegalActions(0):
+                s.generateSuccessor(0, action)
+        finally:
+            pacman.GameState.trackExplored(default)
+        return s
+
+    def testCounterCountsSuccessorsAndKeepsNoStates(self):
+        counter = pacman.ExploredCounter()
+        s = self.expand(counter)
+        self.assertEqual(len(counter), 2 * len(s.getLegalActions(0)))
+        self.assertRaises(TypeError, lambda: s in counter)
+        self.assertRaises(TypeError, list, counter)
+
+    def testExploredStatesKeepsDistinctStatesUpToCapacity(self):
+        everything, bounded = pacman.ExploredStates(), pacman.ExploredStates(2)
+        s = self.expand(everything)
+        self.expand(bounded)
+        self.assertEqual(len(everything), 1 + len(s.getLegalActions(0)))
+        self.assert_(s in everything)
+        self.assertEqual(len(bounded), 2)
+        self.assertEqual(bounded.successors, everything.successors)
+
+class SuccessorCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.state = pacman.GameState()
+        self.state.initialize(layout.getLayout('mediumClassic'), 2)
+
+    def tearDown(self):
+        pacman.GameState.useSuccessorCache(None)
+
+    def assertSameSuccessor(self, successor, expected):
+        self.assertEqual(successor, expected)
+        self.assertEqual(successor.getScore(), expected.getScore())
+        self.assertEqual(successor.isWin(), expected.isWin())
+        self.assertEqual(successor.isLose(), expected.isLose())
+        self.assertEqual(successor.data.scoreChange, expected.data.scoreChange)
+
+    def testHitsAreIndependentCopies(self):
+        s = self.state
+        action = s.getLegalActions(0)[0]
+        expected = s.computeSuccessor(0, action)
+        cache = pacman.SuccessorCache()
+        pacman.GameState.useSuccessorCache(cache)
+        x = s.generateSuccessor(0, action)
+        y = s.generateSuccessor(0, action)
+        z = s.deepCopy().generateSuccessor(0, action)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertAlmostEqual(cache.hitRate(), 2 / 3.0)
+        self.failIf(x is y or y is z)
+        for successor in [x, y, z]: self.assertSameSuccessor(successor, expected)
+
+        x.getGhostState(1).scaredTimer = 5
+        x.data.writableCapsules().pop()
+        x.data.removeFood(x.getFood().asList()[0])
+        y.getPacmanState().scaredTimer = 6
+        for successor in [z, s.generateSuccessor(0, action)]:
+            self.assertSameSuccessor(successor, expected)
+        self.assertEqual(y.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(len(y.getCapsules()), 2)
+        self.assertEqual(y.getNumFood(), expected.getNumFood())
+
+        # Writes to the parent after the miss must not reach the table either
+        original = s.deepCopy()
+        s.getGhostState(2).scaredTimer = 7
+        self.assertSameSuccessor(original.generateSuccessor(0, action), expected)
+        self.assertEqual(cache.hits, 4)
+
+    def testEvictionKeepsResultsRight(self):
+        cache = pacman.SuccessorCache(4)
+        rand = random.Random(0)
+        states = [self.state]
+        for i in range(300):
+            state = rand.choice(states)
+            if state.isWin() or state.isLose(): continue
+            agentIndex = rand.choice([0, 1])
+            action = rand.choice(state.getLegalActions(agentIndex))
+            expected = state.computeSuccessor(agentIndex, action)
+            pacman.GameState.useSuccessorCache(cache)
+            try:
+                successor = state.generateSuccessor(agentIndex, action)
+            finally:
+                pacman.GameState.useSuccessorCache(None)
+            self.assertSameSuccessor(successor, expected)
+            states = states[-2:] + [successor]
+        self.assert_(cache.evictions > 0)
+        self.assert_(cache.hits > 0)
+        self.assert_(len(cache) <= 4)
+
+    def testHashCollisionMisses(self):
+        s = self.state
+        action = s.getLegalActions(0)[0]
+        other = s.generateSuccessor(0, s.getLegalActions(0)[-1])
+        cache = pacman.SuccessorCache()
+        # An entry for a different state under s's key, as if their hashes collided
+        cache.recent[(hash(s), 0, action)] = (other, other.computeSuccessor(1, other.getLegalActions(1)[0]))
+        pacman.GameState.useSuccessorCache(cache)
+        successor = s.generateSuccessor(0, action)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(cache.hitRate(), 0.0)
+        self.assertSameSuccessor(successor, s.computeSuccessor(0, action))
+
+class ObservationTests(unittest.TestCase):
+    def newGame(self):
+        lay = layout.getLayout('mediumClassic')
+        return pacman.ClassicGameRules().newGame(lay, GreedyAgent(), [RandomGhost(1), RandomGhost(2)],
+                                                 textDisplay.NullGraphics(), True, readOnlyObservations=True)
+
+    def testWritingToViewLeavesGameStateAlone(self):
+        game = self.newGame()
+        # Play a few moves so the game state shares AgentStates with earlier states
+        for agentIndex in [0, 1, 2, 0]:
+            action = game.state.getLegalActions(agentIndex)[0]
+            game.state = game.state.generateSuccessor(agentIndex, action)
+        before = game.state.deepCopy()
+        beforeHash = hash(game.state)
+
+        view = game.observe()
+        self.assertEqual(view, game.state)
+        view.getGhostState(1).scaredTimer = 5
+        view.getGhostStates()[1].scaredTimer = 6
+        view.data.writableAgentState(0).configuration = Configuration((1, 1), Directions.NORTH)
+        view.data.writableAgentState(2).scaredTimer = 7
+        x, y = view.getFood().asList()[0]
+        view.getFood()[x][y] = False
+        view.data.removeFood(view.getFood().asList()[1])
+        del view.getCapsules()[:]
+        view.data.removeCapsule(view.getCapsules()[0])
+        view.data.score += 100
+
+        self.assertEqual(game.state, before)
+        self.assertEqual(hash(game.state), beforeHash)
+        self.assertEqual(hash(game.state), hash(before))
+        self.assertEqual(game.state.getGhostState(1).scaredTimer, 0)
+        self.assertEqual(game.state.getGhostState(2).scaredTimer, 0)
+        self.failIf(view == game.state)
+
+    def testViewCopiesNothingUntilWritten(self):
+        game = self.newGame()
+        view = game.observe()
+        self.assert_(view.data.food is game.state.data.food)
+        self.assert_(view.data.agentStates is game.state.data.agentStates)
+        view.getGhostState(1)
+        self.assert_(view.data.food is game.state.data.food)
+        self.failIf(view.data.agentStates[1] is game.state.data.agentStates[1])
+        self.assert_(view.data.agentStates[2] is game.state.data.agentStates[2])
+        # The game state must copy too before it next writes
+        game.state.data.writableAgentState(2).scaredTimer = 4
+        self.assertEqual(view.getGhostState(2).scaredTimer, 0)
+
+class PackedGameTests(unittest.TestCase):
+    def testLockstepWithGameState(self):
+        """
+        Plays fixed-seed random games on capsuleClassic in both engines,
+        comparing them after every move, and checks that scared ghosts
+        moved half a cell, snapped back onto the grid, and were eaten.
+        """
+        lay = layout.getLayout('capsuleClassic')
+        engine = packedGame.PackedGame(lay, 3)
+        rand = random.Random(0)
+        seen = {'halfCell': 0, 'snap': 0, 'capsule': 0, 'ghostEaten': 0}
+        for game in range(200):
+            gameState = pacman.GameState()
+            gameState.initialize(lay, 3)
+            state = engine.getStartState()
+            move = 0
+            while not gameState.isWin() and not gameState.isLose() and move < 1000:
+                self.assertEqual(engine.pack(gameState), state)
+                self.assert_(engine.unpack(state) == gameState)
+                agentIndex = move % gameState.getNumAgents()
+                legal = gameState.getLegalActions(agentIndex)
+                self.assertEqual(engine.getLegalActions(state, agentIndex), legal)
+                action = rand.choice(legal)
+                gameState = gameState.generateSuccessor(agentIndex, action)
+                nextState = engine.generateSuccessor(state, agentIndex, action)
+                self.assertEqual(engine.getScore(nextState), gameState.getScore())
+                self.assertEqual(engine.isWin(nextState), gameState.isWin())
+                self.assertEqual(engine.isLose(nextState), gameState.isLose())
+
+                scoreChange = engine.getScore(nextState) - engine.getScore(state)
+                if nextState[4] != state[4]:
+                    seen['capsule'] += 1
+                    # No points for a capsule, just the time penalty (and any ghosts eaten)
+                    self.assertEqual(scoreChange % 200, 199)
+                    for ghost, nextGhost in zip(state[2], nextState[2]):
+                        self.assert_(nextGhost[3] == pacman.SCARED_TIME or nextGhost[3] == 0)
+                for i, (ghost, nextGhost) in enumerate(zip(state[2], nextState[2])):
+                    if ghost[3] > 0 and nextGhost[3] == 0 and (nextGhost[0], nextGhost[1]) == engine.ghostStarts[i] \
+                            and nextGhost[2] == Directions.STOP:
+                        seen['ghostEaten'] += 1
+                        self.assert_(scoreChange >= 199)
+                if agentIndex > 0:
+                    x2, y2, direction, timer = nextState[2][agentIndex - 1]
+                    if timer > 0 and (x2 % 2 or y2 % 2): seen['halfCell'] += 1
+                    before = state[2][agentIndex - 1]
+                    if before[3] == 1 and (before[0] % 2 or before[1] % 2) and timer == 0:
+                        seen['snap'] += 1
+                        self.failIf(x2 % 2 or y2 % 2)
+                state = nextState
+                move += 1
+        for event, count in seen.items():
+            self.assert_(count > 0, 'no ' + event + ' in the test games')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,7 +22,7 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
-import time, os
+import time, os, random
 import traceback
 import sys
 
@@ -36,6 +36,7 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+    def setMoveTimeout(self, seconds): # told the per-move time limit first
     """
     def __init__(self, index=0):
         self.index = index
@@ -68,18 +69,40 @@ class Directions:
                WEST: EAST,
                STOP: STOP}
 
-class Configuration:
+class Configuration(object):
     """
     A Configuration holds the (x,y) coordinate of a character, along with its
     traveling direction.
 
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
+
+    Configurations are immutable flyweights: Configuration(pos, direction)
+    returns the one shared instance for that position (with the same int or
+    float coordinates) and direction, with its hash computed once.
     """
+    __slots__ = ('pos', 'direction', '_hash')
+    _instances = {}
+
+    def __new__(cls, pos, direction):
+        key = (pos, direction, pos[0].__class__, pos[1].__class__)
+        configuration = cls._instances.get(key)
+        if configuration is None:
+            configuration = object.__new__(cls)
+            object.__setattr__(configuration, 'pos', pos)
+            object.__setattr__(configuration, 'direction', direction)
+            object.__setattr__(configuration, '_hash', hash(hash(pos) + 13 * hash(direction)))
+            cls._instances[key] = configuration
+        return configuration
 
     def __init__(self, pos, direction):
-        self.pos = pos
-        self.direction = direction
+        pass
+
+    def __setattr__(self, name, value):
+        raise AttributeError, 'Configurations are immutable; make a new one instead'
+
+    def __reduce__(self):
+        return (Configuration, (self.pos, self.direction))
 
     def getPosition(self):
         return (self.pos)
@@ -92,13 +115,15 @@ class Configuration:
         return x == int(x) and y == int(y)
 
     def __eq__(self, other):
-        if other == None: return False
+        if self is other: return True
+        if other is None: return False
         return (self.pos == other.pos and self.direction == other.direction)
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        x = hash(self.pos)
-        y = hash(self.direction)
-        return hash(x + 13 * y)
+        return self._hash
 
     def __str__(self):
         return "(x,y)="+str(self.pos)+", "+str(self.direction)
@@ -118,10 +143,15 @@ class Configuration:
             direction = self.direction # There is no stop direction
         return Configuration((x + dx, y+dy), direction)
 
-class AgentState:
+_setattr = object.__setattr__
+
+class AgentState(object):
     """
     AgentStates hold the state of an agent (configuration, speed, scared, etc).
+
+    The hash is cached and forgotten whenever an attribute is set.
     """
+    __slots__ = ('start', 'configuration', 'isPacman', 'scaredTimer', 'numCarrying', '_hash')
 
     def __init__( self, startConfiguration, isPacman ):
         self.start = startConfiguration
@@ -130,6 +160,16 @@ class AgentState:
         self.scaredTimer = 0
         self.numCarrying = 0
 
+    def __setattr__( self, name, value ):
+        _setattr(self, name, value)
+        _setattr(self, '_hash', None)
+
+    def __getstate__( self ):
+        return (self.start, self.configuration, self.isPacman, self.scaredTimer, self.numCarrying)
+
+    def __setstate__( self, state ):
+        self.start, self.configuration, self.isPacman, self.scaredTimer, self.numCarrying = state
+
     def __str__( self ):
         if self.isPacman:
             return "Pacman: " + str( self.configuration )
@@ -137,22 +177,30 @@ class AgentState:
             return "Ghost: " + str( self.configuration )
 
     def __eq__( self, other ):
-        if other == None:
+        if other is None:
             return False
         return self.configuration == other.configuration and self.scaredTimer == other.scaredTimer
 
+    def __ne__( self, other ):
+        return not self == other
+
     def __hash__(self):
-        return hash(hash(self.configuration) + 13 * hash(self.scaredTimer))
+        if self._hash is None:
+            _setattr(self, '_hash', hash(hash(self.configuration) + 13 * hash(self.scaredTimer)))
+        return self._hash
 
     def copy( self ):
-        state = AgentState( self.start, self.isPacman )
-        state.configuration = self.configuration
-        state.scaredTimer = self.scaredTimer
-        state.numCarrying = self.numCarrying
+        state = AgentState.__new__( AgentState )
+        _setattr(state, 'start', self.start)
+        _setattr(state, 'configuration', self.configuration)
+        _setattr(state, 'isPacman', self.isPacman)
+        _setattr(state, 'scaredTimer', self.scaredTimer)
+        _setattr(state, 'numCarrying', self.numCarrying)
+        _setattr(state, '_hash', self._hash)
         return state
 
     def getPosition(self):
-        if self.configuration == None: return None
+        if self.configuration is None: return None
         return self.configuration.getPosition()
 
     def getDirection(self):
@@ -166,12 +214,14 @@ class Grid:
 
     The __str__ method constructs an output that is oriented like a pacman board.
     """
+    actionTable = None # Set on frozen wall grids by Actions.getActionTable
     def __init__(self, width, height, initialValue=False, bitRepresentation=None):
         if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
         self.CELLS_PER_INT = 30
 
         self.width = width
         self.height = height
+        self.frozen = False
         self.data = [[initialValue for y in range(height)] for x in range(width)]
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
@@ -189,7 +239,10 @@ class Grid:
 
     def __eq__(self, other):
         if other == None: return False
-        return self.data == other.data
+        if isinstance(other, BitGrid): return other == self
+        if self.data == other.data: return True
+        # Frozen grids hold tuples rather than lists
+        return map(tuple, self.data) == map(tuple, other.data)
 
     def __hash__(self):
         # return hash(str(self))
@@ -204,9 +257,14 @@ class Grid:
 
     def copy(self):
         g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g.data = [list(x) for x in self.data]
         return g
 
+    def freeze(self):
+        "Makes the grid read-only; copies of it are still writable."
+        self.data = tuple([tuple(x) for x in self.data])
+        self.frozen = True
+
     def deepCopy(self):
         return self.copy()
 
@@ -237,7 +295,7 @@ class Grid:
             bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
             x, y = self._cellIndexToPosition(i)
             if self[x][y]:
-                currentInt += 2 ** bit
+                currentInt |= 1 << bit
             if (i + 1) % self.CELLS_PER_INT == 0:
                 bits.append(currentInt)
                 currentInt = 0
@@ -273,11 +331,138 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid(Grid):
+    """
+    A Grid of booleans stored in a single int: cell (x, y) is bit
+    x * height + y, the order Grid.__hash__ and packBits already use.
+
+    grid[x][y] reads and writes through a column view, so code written for
+    Grid works unchanged, while count, copy, hash, equality and asList work
+    on the whole int at once.  Copies are O(1) and never share state, so
+    shallowCopy is just copy.  Hashes and equality agree with Grid.
+    """
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.frozen = False
+        self.bits = 0
+        if initialValue: self.bits = (1 << (width * height)) - 1
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def __getitem__(self, i):
+        if i < 0: i += self.width
+        if i < 0 or i >= self.width: raise IndexError, 'grid index out of range'
+        return BitGridColumn(self, i * self.height)
+
+    def __setitem__(self, key, item):
+        column = BitGridColumn(self, key * self.height)
+        for y in range(self.height):
+            column[y] = item[y]
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return self.width == other.width and self.height == other.height and \
+            sorted(self.asList()) == sorted(other.asList())
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        return g
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def freeze(self):
+        "Makes the grid read-only; copies of it are still writable."
+        self.frozen = True
+
+    def count(self, item=True):
+        n = bin(self.bits).count('1')
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        bits = self.bits
+        if not key: bits = ~bits & ((1 << (self.width * self.height)) - 1)
+        height = self.height
+        list = []
+        cells = bin(bits)[:1:-1]
+        cell = cells.find('1')
+        while cell >= 0:
+            list.append((cell // height, cell % height))
+            cell = cells.find('1', cell + 1)
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) tuple as
+        Grid.packBits.  Each int holds CELLS_PER_INT cells with the first cell
+        in its highest bit, so every chunk of self.bits is bit-reversed.
+        """
+        size = self.CELLS_PER_INT
+        mask = (1 << size) - 1
+        bits = [self.width, self.height]
+        for start in range(0, self.width * self.height + 1, size):
+            chunk = (self.bits >> start) & mask
+            bits.append(int(bin(chunk)[2:].zfill(size)[::-1], 2))
+        return tuple(bits)
+
+    def _unpackBits(self, bits):
+        size = self.CELLS_PER_INT
+        numCells = self.width * self.height
+        value = 0
+        for i, packed in enumerate(bits):
+            if packed < 0: raise ValueError, "must be a positive integer"
+            value |= int(bin(packed)[2:].zfill(size)[::-1], 2) << (i * size)
+        self.bits = value & ((1 << numCells) - 1)
+
+class BitGridColumn:
+    "Column x of a BitGrid, read and written as grid[x][y]."
+    def __init__(self, grid, offset):
+        self.grid = grid
+        self.offset = offset
+
+    def __getitem__(self, y):
+        height = self.grid.height
+        if y < 0: y += height
+        if y < 0 or y >= height: raise IndexError, 'grid index out of range'
+        return (self.grid.bits >> (self.offset + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if self.grid.frozen: raise TypeError, 'this grid is read-only'
+        height = self.grid.height
+        if y < 0: y += height
+        if y < 0 or y >= height: raise IndexError, 'grid index out of range'
+        if value:
+            self.grid.bits |= 1 << (self.offset + y)
+        else:
+            self.grid.bits &= ~(1 << (self.offset + y))
+
+    def __len__(self):
+        return self.grid.height
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
     width, height = bitRep[:2]
-    return Grid(width, height, bitRepresentation= bitRep[2:])
+    return BitGrid(width, height, bitRepresentation= bitRep[2:])
 
 ####################################
 # Parts you shouldn't have to read #
@@ -329,6 +514,10 @@ class Actions:
     directionToVector = staticmethod(directionToVector)
 
     def getPossibleActions(config, walls):
+        table = walls.actionTable or Actions.getActionTable(walls)
+        if table != None and config.pos in table.actions:
+            return list(table.actions[config.pos])
+
         possible = []
         x, y = config.pos
         x_int, y_int = int(x + 0.5), int(y + 0.5)
@@ -348,6 +537,10 @@ class Actions:
     getPossibleActions = staticmethod(getPossibleActions)
 
     def getLegalNeighbors(position, walls):
+        table = walls.actionTable or Actions.getActionTable(walls)
+        if table != None and position in table.neighbors:
+            return list(table.neighbors[position])
+
         x,y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
         neighbors = []
@@ -367,21 +560,107 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
-class GameStateData:
+    def getActionTable(walls):
+        """
+        The LegalActionTable for a frozen wall Grid (such as a Layout's),
+        built the first time it is asked for.  Returns None for walls that
+        could still change.
+        """
+        table = walls.actionTable
+        if table == None and walls.frozen:
+            walls.frozen = False # The table is built with the general code
+            table = LegalActionTable(walls)
+            walls.actionTable, walls.frozen = table, True
+        return table
+    getActionTable = staticmethod(getActionTable)
+
+class LegalActionTable:
+    """
+    The legal moves from every integer cell of a wall Grid:
+
+      actions[(x, y)]        the legal actions, in Actions.getPossibleActions order
+      neighbors[(x, y)]      the cells Actions.getLegalNeighbors returns
+      ghostActions[(x, y)]   a dictionary from a ghost's heading to the
+                             actions GhostRules.getLegalActions allows it
+
+    The dictionaries are keyed by position, so (2.0, 3.0) finds the same
+    entry as (2, 3) while positions between cells, and cells whose moves
+    would run off the grid, are missing and fall back to the general code.
+    """
+    def __init__(self, walls):
+        self.actions = {}
+        self.neighbors = {}
+        self.ghostActions = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                self.neighbors[(x, y)] = tuple(Actions.getLegalNeighbors((x, y), walls))
+                try:
+                    actions = Actions.getPossibleActions(Configuration((x, y), Directions.STOP), walls)
+                except IndexError:
+                    continue
+                self.actions[(x, y)] = tuple(actions)
+                self.ghostActions[(x, y)] = dict([(heading, tuple(self._ghostActions(actions, heading)))
+                                                  for heading in Directions.REVERSE])
+
+    def _ghostActions(self, actions, heading):
+        "GhostRules.getLegalActions: no stopping, and no turning back except at dead ends."
+        actions = [action for action in actions if action != Directions.STOP]
+        reverse = Actions.reverseDirection(heading)
+        if reverse in actions and len(actions) > 1:
+            actions.remove(reverse)
+        return actions
+
+_ZOBRIST_KEYS = {}
+
+def zobristKeys(width, height, kind='food'):
     """
+    One random key per cell of a width x height board, numbered
+    x * height + y.  Each kind of item gets its own table.
+    """
+    if (width, height, kind) not in _ZOBRIST_KEYS:
+        rand = random.Random(hash((width, height, kind)))
+        _ZOBRIST_KEYS[(width, height, kind)] = [rand.getrandbits(62) for cell in range(width * height)]
+    return _ZOBRIST_KEYS[(width, height, kind)]
+
+def zobristHash(positions, keys, height):
+    "The XOR of the keys of the cells at positions."
+    h = 0
+    for x, y in positions:
+        h ^= keys[x * height + y]
+    return h
 
+class GameStateData:
+    """
+    A successor shares its food, capsules and AgentStates with its
+    predecessor; each is only copied the first time either of them writes
+    it.  Game
+    rules must change them through writableFood, writableCapsules and
+    writableAgentState rather than in place, and should eat food and
+    capsules with removeFood and removeCapsule.
+
+    The hash is kept incrementally: food and capsules are Zobrist hashed
+    (the XOR of a random key per cell) and updated as they are removed,
+    and each AgentState caches its own hash until it is next written.
     """
     def __init__( self, prevState = None ):
         """
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates( prevState.agentStates )
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._foodHash = prevState._foodHash
+            self._capsuleHash = prevState._capsuleHash
+            # Now shared, so the predecessor must copy before its next write too
+            prevState._ownFood = prevState._ownCapsules = False
+            prevState._ownAgentStates = None
+        self._ownFood = False
+        self._ownCapsules = False
+        self._ownAgentStates = None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -392,8 +671,15 @@ class GameStateData:
         self.scoreChange = 0
 
     def deepCopy( self ):
+        ownership = self._ownFood, self._ownCapsules, self._ownAgentStates
         state = GameStateData( self )
+        # The copy replaces everything it would share, so self still owns its data
+        self._ownFood, self._ownCapsules, self._ownAgentStates = ownership
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates( self.agentStates )
+        state._ownFood = state._ownCapsules = True
+        state._ownAgentStates = [True for agentState in state.agentStates]
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -407,12 +693,65 @@ class GameStateData:
             copiedStates.append( agentState.copy() )
         return copiedStates
 
+    def writableFood( self ):
+        "The food Grid, copied first if it is still shared with another state."
+        if not self._ownFood:
+            self.food = self.food.copy()
+            self._ownFood = True
+        self._foodHash = None
+        return self.food
+
+    def writableCapsules( self ):
+        "The capsule list, copied first if it is still shared with another state."
+        if not self._ownCapsules:
+            self.capsules = self.capsules[:]
+            self._ownCapsules = True
+        self._capsuleHash = None
+        return self.capsules
+
+    def writableAgentState( self, index ):
+        "The AgentState for agent index, copied first if it is still shared with another state."
+        if self._ownAgentStates == None:
+            self.agentStates = self.agentStates[:]
+            self._ownAgentStates = [False for agentState in self.agentStates]
+        if not self._ownAgentStates[index]:
+            self.agentStates[index] = self.agentStates[index].copy()
+            self._ownAgentStates[index] = True
+        return self.agentStates[index]
+
+    def removeFood( self, position ):
+        """
+        Eats the food at position, updating the food hash.  Writing to
+        data.food or data.capsules directly instead of through removeFood,
+        removeCapsule, writableFood or writableCapsules leaves the cached
+        _foodHash or _capsuleHash stale (and may change states sharing them).
+        """
+        x, y = position
+        assert self.food[x][y], 'No food to remove at ' + str(position)
+        h = self._foodHash
+        self.writableFood()[x][y] = False
+        if h != None:
+            self._foodHash = h ^ zobristKeys(self.food.width, self.food.height)[x * self.food.height + y]
+
+    def removeCapsule( self, position ):
+        "Eats the capsule at position, updating the capsule hash."
+        h = self._capsuleHash
+        self.writableCapsules().remove( position )
+        if h != None:
+            self._capsuleHash = h ^ zobristHash([position], self._capsuleKeys(), self.food.height)
+
+    def _capsuleKeys( self ):
+        return zobristKeys(self.food.width, self.food.height, 'capsule')
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
         """
         if other == None: return False
         # TODO Check for type of other
+        # Different cached food or capsule hashes mean different food or capsules
+        if self._foodHash != None and other._foodHash != None and self._foodHash != other._foodHash: return False
+        if self._capsuleHash != None and other._capsuleHash != None and self._capsuleHash != other._capsuleHash: return False
         if not self.agentStates == other.agentStates: return False
         if not self.food == other.food: return False
         if not self.capsules == other.capsules: return False
@@ -423,13 +762,16 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError, e:
-                print e
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        width, height = self.food.width, self.food.height
+        if self._foodHash == None:
+            self._foodHash = zobristHash(self.food.asList(), zobristKeys(width, height), height)
+        if self._capsuleHash == None:
+            self._capsuleHash = zobristHash(self.capsules, self._capsuleKeys(), height)
+        h = self._foodHash ^ self._capsuleHash
+        # AgentState caches its own hash and forgets it when written
+        for index, agentState in enumerate( self.agentStates ):
+            h ^= hash( (index, agentState) )
+        return hash( (h, self.score) )
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
@@ -488,7 +830,7 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
-        self.capsules = layout.capsules[:]
+        self.capsules = list(layout.capsules)
         self.layout = layout
         self.score = 0
         self.scoreChange = 0
@@ -501,6 +843,11 @@ class GameStateData:
                 else: numGhosts += 1
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
         self._eaten = [False for a in self.agentStates]
+        self._ownFood = self._ownCapsules = True
+        self._ownAgentStates = [True for a in self.agentStates]
+        # Hash food and capsules now so successors can keep it up incrementally
+        self._foodHash = zobristHash(self.food.asList(), zobristKeys(layout.width, layout.height), layout.height)
+        self._capsuleHash = zobristHash(self.capsules, self._capsuleKeys(), layout.height)
 
 try:
     import boinc
@@ -513,7 +860,7 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False ):
+    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, readOnlyObservations=False ):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -522,6 +869,7 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.readOnlyObservations = readOnlyObservations
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -529,6 +877,16 @@ class Game:
         import cStringIO
         self.agentOutput = [cStringIO.StringIO() for agent in agents]
 
+    def observe(self):
+        """
+        The state handed to an agent: a deep copy, or with readOnlyObservations
+        a view that shares the state's contents until either writes them (see
+        GameState.readOnlyView).
+        """
+        if self.readOnlyObservations:
+            return self.state.readOnlyView()
+        return self.state.deepCopy()
+
     def getProgress(self):
         if self.gameOver:
             return 1.0
@@ -581,14 +939,27 @@ class Game:
                 self.unmute()
                 self._agentCrash(i, quiet=True)
                 return
+            if ("setMoveTimeout" in dir(agent)):
+                self.mute(i)
+                if self.catchExceptions:
+                    try:
+                        agent.setMoveTimeout(self.rules.getMoveTimeout(i))
+                    except Exception,data:
+                        self._agentCrash(i, quiet=False)
+                        self.unmute()
+                        return
+                else:
+                    agent.setMoveTimeout(self.rules.getMoveTimeout(i))
+                self.unmute()
             if ("registerInitialState" in dir(agent)):
                 self.mute(i)
                 if self.catchExceptions:
                     try:
                         timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
                         try:
+                            observation = self.observe()
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(observation)
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -602,7 +973,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self.observe())
                 ## TODO: could this exceed the total time
                 self.unmute()
 
@@ -620,9 +991,10 @@ class Game:
                 if self.catchExceptions:
                     try:
                         timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
+                        observation = self.observe()
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(observation)
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -632,10 +1004,10 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self.observe())
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self.observe()
 
             # Solicit an action
             action = None
@@ -0,0 +1,288 @@
+# hierarchicalSearch.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Hierarchical path-finding (HPA*) for large layouts.
+
+The grid is cut into square clusters.  Wherever open cells face each other
+across the border of two clusters, an entrance is recorded, and the
+distances between the entrance cells of each cluster are precomputed with a
+search that stays inside the cluster.  A query inserts its start and goal
+into this small abstract graph, runs A* over it, and returns an abstract
+path of entrance cells.  The single Pacman moves between two consecutive
+entrance cells are only worked out when they are needed:
+
+  hierarchy = HierarchicalMap(gameState.getWalls())
+  path = hierarchy.abstractPath(start, goal)
+  for i in range(len(path) - 1):
+      actions = hierarchy.refine(path[i], path[i + 1])
+
+Paths are within a few percent of optimal rather than exactly optimal.
+
+A HierarchicalMap keeps its own copy of the walls.  setWall() changes one
+square and rebuilds only the clusters whose entrances or inner distances
+can have changed.
+"""
+import heapq
+import mazeGraph
+from mazeGraph import INFINITY
+
+class HierarchicalMap:
+    """
+    The abstract graph of a wall Grid cut into clusterSize x clusterSize clusters.
+
+    borders maps a border key to its list of (cellA, cellB) entrance pairs,
+    where ('v', cx, cy) is the border between clusters (cx, cy) and
+    (cx + 1, cy), and ('h', cx, cy) the one between (cx, cy) and (cx, cy + 1).
+    intra[cluster] maps each entrance cell of a cluster to its distances to
+    the other entrance cells of the same cluster.
+    """
+
+    def __init__(self, walls, clusterSize=10, maxEntranceWidth=6):
+        self.walls = walls.copy()
+        self.clusterSize = clusterSize
+        self.maxEntranceWidth = maxEntranceWidth
+        self.clustersX = (walls.width + clusterSize - 1) // clusterSize
+        self.clustersY = (walls.height + clusterSize - 1) // clusterSize
+        self.borders = {}
+        self.inter = {}
+        self.intra = {}
+        self.refined = {}
+        self.clustersBuilt = 0
+        for cx in range(self.clustersX):
+            for cy in range(self.clustersY):
+                if cx + 1 < self.clustersX: self._buildBorder(('v', cx, cy))
+                if cy + 1 < self.clustersY: self._buildBorder(('h', cx, cy))
+        for cx in range(self.clustersX):
+            for cy in range(self.clustersY):
+                self._buildCluster((cx, cy))
+
+    def clusterOf(self, position):
+        x, y = position
+        return (x // self.clusterSize, y // self.clusterSize)
+
+    def numNodes(self):
+        return sum([len(nodes) for nodes in self.intra.values()])
+
+    def _bounds(self, cluster):
+        "Returns (x0, y0, x1, y1), the half-open cell range of a cluster."
+        cx, cy = cluster
+        size = self.clusterSize
+        return (cx * size, cy * size, min((cx + 1) * size, self.walls.width), min((cy + 1) * size, self.walls.height))
+
+    def _clusterBorders(self, cluster):
+        "The keys of the (up to four) borders around a cluster."
+        cx, cy = cluster
+        keys = []
+        if cx + 1 < self.clustersX: keys.append(('v', cx, cy))
+        if cx > 0: keys.append(('v', cx - 1, cy))
+        if cy + 1 < self.clustersY: keys.append(('h', cx, cy))
+        if cy > 0: keys.append(('h', cx, cy - 1))
+        return keys
+
+    def _buildBorder(self, key):
+        """
+        Finds the entrances on a border: maximal runs of open cells facing each
+        other.  Narrow runs get one transition in the middle, wide runs one at
+        each end.  Returns True if the border's transitions changed.
+        """
+        kind, cx, cy = key
+        x0, y0, x1, y1 = self._bounds((cx, cy))
+        if kind == 'v':
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+        transitions = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a != None and not self.walls[a[0]][a[1]] and not self.walls[b[0]][b[1]]:
+                run.append((a, b))
+                continue
+            if len(run) >= self.maxEntranceWidth:
+                transitions.append(run[0])
+                transitions.append(run[-1])
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+
+        old = self.borders.get(key, [])
+        self.borders[key] = transitions
+        if old == transitions: return False
+        for a, b in old:
+            self._unlink(a, b)
+        for a, b in transitions:
+            self.inter.setdefault(a, {})[b] = 1
+            self.inter.setdefault(b, {})[a] = 1
+        return True
+
+    def _unlink(self, a, b):
+        for u, v in [(a, b), (b, a)]:
+            del self.inter[u][v]
+            if not self.inter[u]: del self.inter[u]
+
+    def _buildCluster(self, cluster):
+        "Recomputes the distances between the entrance cells of one cluster."
+        self.clustersBuilt += 1
+        nodes = set()
+        for key in self._clusterBorders(cluster):
+            for a, b in self.borders.get(key, []):
+                if self.clusterOf(a) == cluster: nodes.add(a)
+                if self.clusterOf(b) == cluster: nodes.add(b)
+        table = {}
+        for node in nodes:
+            dist = self._localDistances(node, cluster)
+            table[node] = dict([(other, dist[other]) for other in nodes if other != node and other in dist])
+        self.intra[cluster] = table
+        self.refined[cluster] = {}
+
+    def _localSearch(self, source, cluster):
+        "Breadth first search from source inside a cluster; returns (dist, parent) dicts."
+        x0, y0, x1, y1 = self._bounds(cluster)
+        walls = self.walls
+        dist = {source: 0}
+        parent = {source: None}
+        frontier = [source]
+        while frontier:
+            nextFrontier = []
+            for position in frontier:
+                x, y = position
+                for code in range(len(mazeGraph.ACTIONS)):
+                    dx, dy = mazeGraph.VECTORS[code]
+                    nextx, nexty = x + dx, y + dy
+                    if nextx < x0 or nextx >= x1 or nexty < y0 or nexty >= y1: continue
+                    if walls[nextx][nexty] or (nextx, nexty) in dist: continue
+                    dist[(nextx, nexty)] = dist[position] + 1
+                    parent[(nextx, nexty)] = (position, mazeGraph.ACTIONS[code])
+                    nextFrontier.append((nextx, nexty))
+            frontier = nextFrontier
+        return dist, parent
+
+    def _localDistances(self, source, cluster):
+        return self._localSearch(source, cluster)[0]
+
+    def setWall(self, position, isWall):
+        """
+        Adds or removes the wall at position.  Only the cluster holding it, and
+        a neighboring cluster whose shared entrances changed, are rebuilt.
+        Returns the list of rebuilt clusters.
+        """
+        x, y = position
+        if self.walls[x][y] == isWall: return []
+        self.walls[x][y] = isWall
+        cluster = self.clusterOf(position)
+        dirty = set([cluster])
+        x0, y0, x1, y1 = self._bounds(cluster)
+        for key in self._clusterBorders(cluster):
+            kind, cx, cy = key
+            # Only borders that position lies on can gain or lose entrances
+            if kind == 'v' and x not in (x0, x1 - 1): continue
+            if kind == 'h' and y not in (y0, y1 - 1): continue
+            if (cx, cy) != cluster: otherCluster = (cx, cy)
+            elif kind == 'v': otherCluster = (cx + 1, cy)
+            else: otherCluster = (cx, cy + 1)
+            if self._buildBorder(key): dirty.add(otherCluster)
+        for c in dirty:
+            self._buildCluster(c)
+        return list(dirty)
+
+    def _endpointEdges(self, position):
+        "The (entrance cell, distance) edges from position to its cluster's entrances."
+        cluster = self.clusterOf(position)
+        dist = self._localDistances(position, cluster)
+        return [(node, dist[node]) for node in self.intra[cluster] if node in dist]
+
+    def abstractPath(self, start, goal):
+        """
+        Returns a list of positions from start to goal in which consecutive
+        positions are either in the same cluster or on either side of an
+        entrance, or None if goal cannot be reached.
+        """
+        x, y = start
+        if self.walls[x][y] or self.walls[goal[0]][goal[1]]: return None
+        if start == goal: return [start]
+        goalEdges = {}
+        for node, d in self._endpointEdges(goal):
+            goalEdges[node] = d
+        startEdges = self._endpointEdges(start)
+        if self.clusterOf(start) == self.clusterOf(goal):
+            direct = self._localDistances(start, self.clusterOf(start)).get(goal)
+            if direct != None: startEdges.append((goal, direct))
+
+        def heuristic(position):
+            return abs(position[0] - goal[0]) + abs(position[1] - goal[1])
+
+        best = {start: 0}
+        parent = {start: None}
+        heap = [(heuristic(start), 0, start)]
+        while heap:
+            f, g, position = heapq.heappop(heap)
+            if g > best[position]: continue
+            if position == goal:
+                path = []
+                while position != None:
+                    path.append(position)
+                    position = parent[position]
+                path.reverse()
+                return path
+            if position == start:
+                edges = startEdges + self.inter.get(position, {}).items()
+            else:
+                edges = self.intra[self.clusterOf(position)].get(position, {}).items()
+                edges += self.inter.get(position, {}).items()
+                if position in goalEdges: edges.append((goal, goalEdges[position]))
+            for nextPosition, cost in edges:
+                if g + cost < best.get(nextPosition, INFINITY):
+                    best[nextPosition] = g + cost
+                    parent[nextPosition] = position
+                    heapq.heappush(heap, (g + cost + heuristic(nextPosition), g + cost, nextPosition))
+        return None
+
+    def refine(self, position, nextPosition):
+        "The single Pacman moves between two consecutive positions of an abstract path."
+        if nextPosition in self.inter.get(position, {}):
+            dx, dy = nextPosition[0] - position[0], nextPosition[1] - position[1]
+            return [mazeGraph.ACTIONS[list(mazeGraph.VECTORS).index((dx, dy))]]
+        cluster = self.clusterOf(position)
+        cache = self.refined[cluster]
+        if (position, nextPosition) not in cache:
+            dist, parent = self._localSearch(position, cluster)
+            actions = []
+            current = nextPosition
+            while parent[current] != None:
+                current, action = parent[current]
+                actions.append(action)
+            actions.reverse()
+            cache[(position, nextPosition)] = actions
+        return list(cache[(position, nextPosition)])
+
+    def findPath(self, start, goal):
+        "The fully refined list of Directions from start to goal, or None."
+        path = self.abstractPath(start, goal)
+        if path == None: return None
+        actions = []
+        for i in range(len(path) - 1):
+            actions += self.refine(path[i], path[i + 1])
+        return actions
+
+def getHierarchicalMap(walls, clusterSize=10):
+    """
+    Returns the shared HierarchicalMap for a wall Grid, building it on first
+    use.  Maps that will be edited with setWall should be built directly.
+    """
+    graph = mazeGraph.getMazeGraph(walls)
+    key = ('hierarchy', clusterSize)
+    if key not in graph.tables:
+        graph.tables[key] = HierarchicalMap(walls, clusterSize)
+    return graph.tables[key]
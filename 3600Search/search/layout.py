@@ -14,39 +14,63 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, BitGrid
 import os
 import random
 
 VISIBILITY_MATRIX_CACHE = {}
 
+_LAYOUTS = {}
+
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    Layouts are immutable once built, so every GameState (and every copy of
+    one) shares its Layout by reference.  Setting an attribute raises an
+    AttributeError, the wall and food Grids are frozen, and capsules and
+    agentPositions are tuples.
     """
 
     def __init__(self, layoutText):
         self.width = len(layoutText[0])
         self.height= len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
-        self.layoutText = layoutText
+        self.layoutText = tuple(layoutText)
         # self.initializeVisibilityMatrix()
+        self.capsules = tuple(self.capsules)
+        self.agentPositions = tuple(self.agentPositions)
+        self.walls.freeze()
+        self.food.freeze()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError, 'Layouts are immutable; cannot set ' + name
+        self.__dict__[name] = value
 
     def getNumGhosts(self):
         return self.numGhosts
 
     def initializeVisibilityMatrix(self):
-        global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
+        """
+        Returns the visibility matrix, vis[x][y][direction] being the set of
+        (half-)positions seen looking that way from (x, y).  Layouts are
+        immutable, so it is kept in VISIBILITY_MATRIX_CACHE rather than on
+        the layout.
+        """
+        key = self._visibilityKey()
+        if key not in VISIBILITY_MATRIX_CACHE:
             from game import Directions
-            vecs = [(-0.5,0), (0.5,0),(0,-0.5),(0,0.5)]
+            vecs = [(0,0.5), (0,-0.5), (-0.5,0), (0.5,0)]
             dirs = [Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()})
+            vis = [[dict([(direction, set()) for direction in dirs + [Directions.STOP]]) for y in range(self.height)]
+                   for x in range(self.width)]
             for x in range(self.width):
                 for y in range(self.height):
                     if self.walls[x][y] == False:
@@ -55,11 +79,12 @@ class Layout:
                             nextx, nexty = x + dx, y + dy
                             while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)] :
                                 vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
-            self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+                                nextx, nexty = nextx + dx, nexty + dy
+            VISIBILITY_MATRIX_CACHE[key] = vis
+        return VISIBILITY_MATRIX_CACHE[key]
+
+    def _visibilityKey(self):
+        return reduce(str.__add__, self.layoutText)
 
     def isWall(self, pos):
         x, col = pos
@@ -84,13 +109,14 @@ class Layout:
 
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
         row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        return ghostPos in self.initializeVisibilityMatrix()[row][col][pacDirection]
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        "Layouts are immutable, so a copy is the layout itself."
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -145,5 +171,12 @@ def getLayout(name, back = 2):
 def tryToLoad(fullname):
     if(not os.path.exists(fullname)): return None
     f = open(fullname)
-    try: return Layout([line.strip() for line in f])
+    try: return internLayout([line.strip() for line in f])
     finally: f.close()
+
+def internLayout(layoutText):
+    "Returns the one shared Layout for layoutText, building it the first time."
+    key = tuple(layoutText)
+    if key not in _LAYOUTS:
+        _LAYOUTS[key] = Layout(layoutText)
+    return _LAYOUTS[key]
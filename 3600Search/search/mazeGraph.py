@@ -0,0 +1,450 @@
+# mazeGraph.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Precomputed successor tables for the open cells of a layout.
+
+The search problems in searchAgents.py all move Pacman one square North,
+South, East or West.  Rather than rebuilding those moves from the walls on
+every call to getSuccessors, a MazeGraph is built once per wall layout and
+shared:
+
+  graph = getMazeGraph(gameState.getWalls())
+
+Cells are numbered x * height + y, the same order Grid uses for packBits.
+
+distances() answers many maze-distance queries at once, sharing breadth
+first sweeps between them; NumPy is used for the result when installed.
+
+Tables derived from a graph (such as the landmark distances used by the ALT
+heuristic) are built on demand and kept in graph.tables, so they are shared
+the same way.
+"""
+from game import Directions
+from array import array
+import random
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INFINITY = 999999
+
+# Action codes used in the flat neighbor arrays, in successor order
+ACTIONS = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+VECTORS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+class MazeGraph:
+    """
+    The move graph of a wall Grid.
+
+    The neighbors of cell c are neighborCells[neighborStart[c]:neighborStart[c+1]]
+    and the moves that reach them are ACTIONS[neighborActions[...]].  For the
+    Python hot paths the same table is also kept per cell as tuples:
+
+      neighbors[c]       ((nextCell, action), ...)
+      moves[c]           (((nextx, nexty), action), ...)
+      unitSuccessors[c]  (((nextx, nexty), action, 1), ...)
+
+    tables holds derived per-layout tables, keyed by the helper that built them.
+    """
+
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        numCells = self.width * self.height
+        self.neighborStart = array('l', [0] * (numCells + 1))
+        self.neighborCells = array('l')
+        self.neighborActions = array('b')
+        self.isOpen = array('b', [0] * numCells)
+        for x in range(self.width):
+            for y in range(self.height):
+                cell = x * self.height + y
+                self.neighborStart[cell] = len(self.neighborCells)
+                if walls[x][y]: continue
+                self.isOpen[cell] = 1
+                for code in range(len(ACTIONS)):
+                    dx, dy = VECTORS[code]
+                    nextx, nexty = x + dx, y + dy
+                    if nextx < 0 or nextx >= self.width or nexty < 0 or nexty >= self.height: continue
+                    if not walls[nextx][nexty]:
+                        self.neighborCells.append(nextx * self.height + nexty)
+                        self.neighborActions.append(code)
+        self.neighborStart[numCells] = len(self.neighborCells)
+
+        self.neighbors = [()] * numCells
+        self.moves = [()] * numCells
+        self.unitSuccessors = [()] * numCells
+        for cell in range(numCells):
+            first, last = self.neighborStart[cell], self.neighborStart[cell + 1]
+            self.neighbors[cell] = tuple([(self.neighborCells[i], ACTIONS[self.neighborActions[i]]) for i in range(first, last)])
+            self.moves[cell] = tuple([(self.position(nextCell), action) for nextCell, action in self.neighbors[cell]])
+            self.unitSuccessors[cell] = tuple([(position, action, 1) for position, action in self.moves[cell]])
+        self.tables = {}
+
+    def cell(self, position):
+        x, y = position
+        return x * self.height + y
+
+    def position(self, cell):
+        return (cell // self.height, cell % self.height)
+
+    def openCells(self):
+        return [cell for cell in range(len(self.isOpen)) if self.isOpen[cell]]
+
+    def bfsDistances(self, source):
+        "Maze distances from source to every cell id; unreachable cells get INFINITY."
+        neighbors = self.neighbors
+        dist = [INFINITY] * len(neighbors)
+        dist[source] = 0
+        frontier = [source]
+        d = 0
+        while frontier:
+            d += 1
+            nextFrontier = []
+            for cell in frontier:
+                for nextCell, action in neighbors[cell]:
+                    if dist[nextCell] > d:
+                        dist[nextCell] = d
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+        return dist
+
+    def multiSourceDistances(self, sources):
+        """
+        One breadth first sweep from all the source cells at once.  Returns
+        (dist, owner): dist[c] is the distance from c to the nearest source and
+        owner[c] that source (-1 where unreachable).
+        """
+        neighbors = self.neighbors
+        dist = [INFINITY] * len(neighbors)
+        owner = [-1] * len(neighbors)
+        frontier = []
+        for source in sources:
+            if dist[source] == 0: continue
+            dist[source], owner[source] = 0, source
+            frontier.append(source)
+        d = 0
+        while frontier:
+            d += 1
+            nextFrontier = []
+            for cell in frontier:
+                for nextCell, action in neighbors[cell]:
+                    if dist[nextCell] > d:
+                        dist[nextCell] = d
+                        owner[nextCell] = owner[cell]
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+        return dist, owner
+
+    def _bfsUntil(self, source, wanted):
+        "Breadth first search from source that stops once every cell in wanted is reached."
+        neighbors = self.neighbors
+        dist = {source: 0}
+        remaining = len(wanted) - (source in wanted)
+        frontier = [source]
+        d = 0
+        while frontier and remaining > 0:
+            d += 1
+            nextFrontier = []
+            for cell in frontier:
+                for nextCell, action in neighbors[cell]:
+                    if nextCell not in dist:
+                        dist[nextCell] = d
+                        if nextCell in wanted: remaining -= 1
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+        return dist
+
+    def distances(self, sources, targets):
+        """
+        The matrix of maze distances from each source position (rows) to each
+        target position (columns), INFINITY where unreachable; a NumPy array
+        when NumPy is installed, else a list of lists.
+
+        Repeated positions are searched once, and since moves are reversible
+        the sweeps start from whichever side has fewer distinct positions.  Each
+        sweep stops as soon as it has reached every cell on the other side, so
+        one source against all the food is a single partial search.
+        """
+        sourceCells = [self.cell(position) for position in sources]
+        targetCells = [self.cell(position) for position in targets]
+        if len(set(sourceCells)) <= len(set(targetCells)):
+            rows = self._sweep(sourceCells, targetCells)
+        else:
+            columns = self._sweep(targetCells, sourceCells)
+            rows = [[columns[j][i] for j in range(len(targetCells))] for i in range(len(sourceCells))]
+        return asMatrix(rows)
+
+    def _sweep(self, fromCells, toCells):
+        wanted = set(toCells)
+        found = {}
+        for cell in fromCells:
+            if cell not in found: found[cell] = self._bfsUntil(cell, wanted)
+        return [[found[cell].get(toCell, INFINITY) for toCell in toCells] for cell in fromCells]
+
+    def pairDistances(self, pairs):
+        """
+        The maze distance for each (source, target) position pair.  Pairs that
+        share a source (or, if that gives fewer groups, a target) are answered
+        by one sweep.
+        """
+        cellPairs = [(self.cell(source), self.cell(target)) for source, target in pairs]
+        if len(set([a for a, b in cellPairs])) > len(set([b for a, b in cellPairs])):
+            cellPairs = [(b, a) for a, b in cellPairs]
+        groups = {}
+        for a, b in cellPairs:
+            groups.setdefault(a, set()).add(b)
+        found = dict([(a, self._bfsUntil(a, wanted)) for a, wanted in groups.items()])
+        return [found[a].get(b, INFINITY) for a, b in cellPairs]
+
+    def nearestDistances(self, sources, targets):
+        "For each source position, the maze distance to its nearest target, from one sweep."
+        dist, owner = self.multiSourceDistances([self.cell(position) for position in targets])
+        return [dist[self.cell(position)] for position in sources]
+
+    def nearestNeighborDistances(self, sites):
+        """
+        For each site position, the maze distance to the nearest other site,
+        from one multi-source sweep: the shortest path from a site to its
+        nearest neighbor leaves the site's own region across some edge (u, v),
+        so it is the least dist[u] + 1 + dist[v] over such edges.
+        """
+        cells = [self.cell(position) for position in sites]
+        dist, owner = self.multiSourceDistances(cells)
+        best = {}
+        for cell in range(len(self.neighbors)):
+            if owner[cell] == -1: continue
+            for nextCell, action in self.neighbors[cell]:
+                if owner[nextCell] != owner[cell]:
+                    d = dist[cell] + 1 + dist[nextCell]
+                    if d < best.get(owner[cell], INFINITY): best[owner[cell]] = d
+        counts = {}
+        for cell in cells: counts[cell] = counts.get(cell, 0) + 1
+        result = []
+        for cell in cells:
+            # A site listed twice is its own nearest neighbor
+            if counts[cell] > 1: result.append(0)
+            else: result.append(best.get(cell, INFINITY))
+        return result
+
+    def walkDownhill(self, dist, cell):
+        "Returns (actions, endCell) following a distance array downhill from cell to a zero."
+        neighbors = self.neighbors
+        actions = []
+        while dist[cell] > 0:
+            for nextCell, action in neighbors[cell]:
+                if dist[nextCell] == dist[cell] - 1:
+                    actions.append(action)
+                    cell = nextCell
+                    break
+        return actions, cell
+
+class LandmarkTable:
+    """
+    Exact maze distances from a few landmark cells, giving ALT lower bounds:
+    by the triangle inequality, |d(L, u) - d(L, v)| <= d(u, v) for every
+    landmark L.  Only numLandmarks distance arrays are stored, instead of
+    the all-pairs matrix.
+
+    selection is 'farthest' (each new landmark is the cell farthest from the
+    landmarks so far) or 'avoid' (Goldberg and Harrelson's heuristic, which
+    picks landmarks behind regions where the current bounds are weakest).
+    """
+
+    def __init__(self, graph, numLandmarks=8, selection='farthest', seed=0):
+        self.graph = graph
+        self.landmarks = []
+        self.distances = []
+        openCells = graph.openCells()
+        if len(openCells) == 0: return
+        numLandmarks = min(numLandmarks, len(openCells))
+        if selection == 'farthest':
+            self._selectFarthest(numLandmarks, openCells)
+        elif selection == 'avoid':
+            self._selectAvoid(numLandmarks, openCells, random.Random(seed))
+        else:
+            raise Exception('Unknown landmark selection: ' + str(selection))
+
+    def addLandmark(self, cell):
+        self.landmarks.append(cell)
+        self.distances.append(array('l', self.graph.bfsDistances(cell)))
+
+    def lowerBound(self, cell, goalCell):
+        "The best landmark lower bound on the maze distance between two cells."
+        best = 0
+        for dist in self.distances:
+            d = dist[cell] - dist[goalCell]
+            if d < 0: d = -d
+            if d > best: best = d
+        return best
+
+    def memoryBytes(self):
+        return sum([dist.itemsize * len(dist) for dist in self.distances])
+
+    def _selectFarthest(self, numLandmarks, openCells):
+        if self.landmarks:
+            nearest = [min(ds) for ds in zip(*self.distances)]
+        else:
+            # Bootstrap from the cell farthest from an arbitrary open cell
+            nearest = self.graph.bfsDistances(openCells[0])
+        while len(self.landmarks) < numLandmarks:
+            cell = max(openCells, key=lambda c: (nearest[c], -c))
+            if nearest[cell] == 0: break
+            self.addLandmark(cell)
+            if len(self.landmarks) == 1:
+                nearest = list(self.distances[0])
+            else:
+                nearest = [min(a, b) for a, b in zip(nearest, self.distances[-1])]
+
+    def _selectAvoid(self, numLandmarks, openCells, rand, attempts=10):
+        self._selectFarthest(1, openCells)
+        while len(self.landmarks) < numLandmarks:
+            for attempt in range(attempts):
+                cell = self._avoidCandidate(rand.choice(openCells))
+                if cell != None: break
+            if cell != None:
+                self.addLandmark(cell)
+            else:
+                # Every root was already well covered; fall back to farthest
+                before = len(self.landmarks)
+                self._selectFarthest(before + 1, openCells)
+                if len(self.landmarks) == before: break
+
+    def _avoidCandidate(self, root):
+        """
+        Grows a shortest-path tree from root.  A vertex weighs how much the
+        current bounds underestimate its distance from the root, and subtrees
+        holding a landmark weigh nothing.  Walking down the heaviest branch
+        ends at the candidate leaf, or None if root has no such branch.
+        """
+        neighbors = self.graph.neighbors
+        dist = [INFINITY] * len(neighbors)
+        parent = [-1] * len(neighbors)
+        dist[root] = 0
+        order = [root]
+        for cell in order:
+            for nextCell, action in neighbors[cell]:
+                if dist[nextCell] == INFINITY:
+                    dist[nextCell] = dist[cell] + 1
+                    parent[nextCell] = cell
+                    order.append(nextCell)
+        size = [0] * len(neighbors)
+        covered = [False] * len(neighbors)
+        for cell in self.landmarks: covered[cell] = True
+        children = [[] for i in range(len(neighbors))]
+        for cell in reversed(order):
+            size[cell] += dist[cell] - self.lowerBound(root, cell)
+            if covered[cell]: size[cell] = 0
+            if parent[cell] != -1:
+                size[parent[cell]] += size[cell]
+                covered[parent[cell]] = covered[parent[cell]] or covered[cell]
+                children[parent[cell]].append(cell)
+        cell = root
+        while True:
+            heavy = [c for c in children[cell] if size[c] > 0]
+            if not heavy: break
+            cell = max(heavy, key=lambda c: (size[c], -c))
+        if cell == root or covered[cell]: return None
+        return cell
+
+def asMatrix(rows):
+    "A list of rows as a NumPy array when NumPy is installed, else unchanged."
+    if numpy == None: return rows
+    return numpy.array(rows, dtype=numpy.int64).reshape((len(rows), len(rows) and len(rows[0]) or 0))
+
+def getLandmarkTable(walls, numLandmarks=8, selection='farthest'):
+    "Returns the shared LandmarkTable for a wall Grid, building it on first use."
+    graph = getMazeGraph(walls)
+    key = ('landmarks', numLandmarks, selection)
+    if key not in graph.tables:
+        graph.tables[key] = LandmarkTable(graph, numLandmarks, selection)
+    return graph.tables[key]
+
+def getSymmetries(walls):
+    """
+    Returns the mirror and rotation symmetries of a wall Grid as cell
+    permutations (perm[cell] is the image of cell), identity first.  They are
+    found once per layout and kept in the MazeGraph's tables.
+    """
+    graph = getMazeGraph(walls)
+    if 'symmetries' not in graph.tables:
+        width, height = graph.width, graph.height
+        transforms = [lambda x, y: (x, y),
+                      lambda x, y: (width - 1 - x, y),
+                      lambda x, y: (x, height - 1 - y),
+                      lambda x, y: (width - 1 - x, height - 1 - y)]
+        if width == height:
+            transforms += [lambda x, y: (y, x),
+                           lambda x, y: (width - 1 - y, width - 1 - x),
+                           lambda x, y: (y, width - 1 - x),
+                           lambda x, y: (width - 1 - y, x)]
+        symmetries = []
+        for transform in transforms:
+            perm = array('l', [0] * (width * height))
+            for x in range(width):
+                for y in range(height):
+                    perm[x * height + y] = graph.cell(transform(x, y))
+            if all([graph.isOpen[cell] == graph.isOpen[perm[cell]] for cell in range(len(perm))]):
+                symmetries.append(perm)
+        graph.tables['symmetries'] = symmetries
+    return graph.tables['symmetries']
+
+def getCorridors(walls):
+    """
+    Returns, for every cell, a tuple with one (cells, actions) pair per exit:
+    the cells passed through when leaving by that exit and following the
+    corridor until a junction or dead end (a cell without exactly two exits)
+    or back to the starting cell, and the actions taken.  Built once per
+    layout and kept in the MazeGraph's tables.
+    """
+    graph = getMazeGraph(walls)
+    if 'corridors' not in graph.tables:
+        neighbors = graph.neighbors
+        corridors = [()] * len(neighbors)
+        for cell in graph.openCells():
+            exits = []
+            for nextCell, action in neighbors[cell]:
+                cells, actions = [nextCell], [action]
+                previous = cell
+                while len(neighbors[cells[-1]]) == 2 and cells[-1] != cell:
+                    for afterCell, afterAction in neighbors[cells[-1]]:
+                        if afterCell != previous: break
+                    previous = cells[-1]
+                    cells.append(afterCell)
+                    actions.append(afterAction)
+                exits.append((tuple(cells), tuple(actions)))
+            corridors[cell] = tuple(exits)
+        graph.tables['corridors'] = corridors
+    return graph.tables['corridors']
+
+_MAZE_GRAPH_CACHE = {}
+_lastWalls = [None, None]
+
+def getMazeGraph(walls):
+    """
+    Returns the shared MazeGraph for a wall Grid, building it the first time
+    a layout with these walls is seen.  Only frozen walls (a Layout's) are
+    remembered by identity; others could have changed since, so they are
+    looked up by value every time.
+    """
+    if _lastWalls[0] is walls: return _lastWalls[1]
+    graph = _MAZE_GRAPH_CACHE.get(walls)
+    if graph == None:
+        graph = MazeGraph(walls)
+        _MAZE_GRAPH_CACHE[walls.copy()] = graph
+    if walls.frozen:
+        _lastWalls[0], _lastWalls[1] = walls, graph
+    return graph
@@ -0,0 +1,231 @@
+# packedGame.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A second implementation of the classic Pacman rules on small immutable
+tuples, for agents (minimax, expectimax, Monte Carlo playouts) that
+generate far more successors than GameState.generateSuccessor can afford.
+
+A packed state is
+
+  (pacman, pacmanDirection, ghosts, food, capsules, score, outcome)
+
+where pacman is Pacman's cell (x * height + y), ghosts holds one
+(x2, y2, direction, scaredTimer) tuple per ghost with the coordinates
+doubled so that half-speed scared ghosts stay on integers, food is the
+food bitmask (the same bits as a BitGrid), capsules has bit i set while
+the layout's i-th capsule remains, and outcome is WIN, LOSE or PLAYING.
+
+PackedGame implements PacmanRules, GhostRules and the scoring in pacman.py
+move for move, and converts to and from GameState with pack and unpack;
+verifyAgainstGameState plays random games in both to check that they agree.
+"""
+import random
+import pacman
+from game import Directions, Actions, Configuration
+
+PLAYING, WIN, LOSE = 0, 1, -1
+
+class PackedGame:
+    """
+    The rules for one layout and number of ghosts.  All of the per-layout
+    work (legal moves, neighbours, ghost start positions) is done once here.
+    """
+    def __init__(self, layout, numGhosts):
+        self.layout = layout
+        self.height = layout.height
+        walls = layout.walls
+        self.table = Actions.getActionTable(walls)
+        if self.table == None: raise Exception('PackedGame needs a layout with frozen walls')
+        self.vectors = {}
+        for direction in Directions.REVERSE:
+            dx, dy = Actions.directionToVector(direction)
+            self.vectors[direction] = (int(dx), int(dy))
+        self.capsulePositions = tuple(layout.capsules)
+        start = pacman.GameState()
+        start.initialize(layout, numGhosts)
+        self.numGhosts = start.getNumAgents() - 1
+        self.ghostStarts = [self._doubled(start.getGhostPosition(index)) for index in range(1, self.numGhosts + 1)]
+        self.startState = self.pack(start)
+
+    def _doubled(self, position):
+        x, y = position
+        if x * 2 != int(x * 2) or y * 2 != int(y * 2):
+            raise Exception('Position %s is not on a half cell' % str(position))
+        return int(x * 2), int(y * 2)
+
+    def getStartState(self):
+        return self.startState
+
+    def pack(self, gameState):
+        "The packed state for a GameState of this layout."
+        data = gameState.data
+        x, y = gameState.getPacmanPosition()
+        if x != int(x) or y != int(y): raise Exception('Pacman is between cells')
+        pacmanCell = int(x) * self.height + int(y)
+        ghosts = []
+        for index in range(1, gameState.getNumAgents()):
+            ghostState = data.agentStates[index]
+            x2, y2 = self._doubled(ghostState.configuration.pos)
+            ghosts.append((x2, y2, ghostState.configuration.direction, ghostState.scaredTimer))
+        food = data.food
+        if 'bits' in dir(food):
+            foodBits = food.bits
+        else:
+            foodBits = 0
+            for x, y in food.asList():
+                foodBits |= 1 << (x * self.height + y)
+        capsules = 0
+        for i, position in enumerate(self.capsulePositions):
+            if position in data.capsules: capsules |= 1 << i
+        outcome = PLAYING
+        if data._win: outcome = WIN
+        if data._lose: outcome = LOSE
+        return (pacmanCell, data.agentStates[0].configuration.direction, tuple(ghosts), foodBits,
+                capsules, data.score, outcome)
+
+    def unpack(self, state):
+        "A GameState equal to the packed state."
+        pacmanCell, pacmanDirection, ghosts, food, capsules, score, outcome = state
+        gameState = pacman.GameState()
+        gameState.initialize(self.layout, self.numGhosts)
+        data = gameState.data
+        position = (pacmanCell // self.height, pacmanCell % self.height)
+        data.writableAgentState(0).configuration = Configuration(position, pacmanDirection)
+        for index, (x2, y2, direction, scaredTimer) in enumerate(ghosts):
+            ghostState = data.writableAgentState(index + 1)
+            ghostState.configuration = Configuration(self._position(x2, y2), direction)
+            ghostState.scaredTimer = scaredTimer
+        data.writableFood().bits = food
+        capsuleList = data.writableCapsules()
+        del capsuleList[:]
+        for i, position in enumerate(self.capsulePositions):
+            if capsules & (1 << i): capsuleList.append(position)
+        data.score = score
+        data._win = outcome == WIN
+        data._lose = outcome == LOSE
+        return gameState
+
+    def _position(self, x2, y2):
+        "The GameState position for doubled coordinates: ints on a cell, floats between cells."
+        if x2 % 2 or y2 % 2: return (x2 / 2.0, y2 / 2.0)
+        return (x2 // 2, y2 // 2)
+
+    def isWin(self, state):
+        return state[6] == WIN
+
+    def isLose(self, state):
+        return state[6] == LOSE
+
+    def getScore(self, state):
+        return state[5]
+
+    def getNumAgents(self):
+        return self.numGhosts + 1
+
+    def getLegalActions(self, state, agentIndex=0):
+        "The same actions, in the same order, as GameState.getLegalActions."
+        if state[6] != PLAYING: return []
+        if agentIndex == 0:
+            cell = state[0]
+            return list(self.table.actions[(cell // self.height, cell % self.height)])
+        x2, y2, direction, scaredTimer = state[2][agentIndex - 1]
+        if x2 % 2 or y2 % 2:
+            # In between grid points, ghosts must continue straight
+            return [direction]
+        return list(self.table.ghostActions[(x2 // 2, y2 // 2)][direction])
+
+    def generateSuccessor(self, state, agentIndex, action):
+        "The packed state after agentIndex takes action, as GameState.generateSuccessor."
+        pacmanCell, pacmanDirection, ghosts, food, capsules, score, outcome = state
+        if outcome != PLAYING: raise Exception('Can\'t generate a successor of a terminal state.')
+        if action not in self.getLegalActions(state, agentIndex):
+            raise Exception('Illegal action ' + str(action))
+        height = self.height
+        scoreChange = 0
+        if agentIndex == 0:
+            dx, dy = self.vectors[action]
+            pacmanCell += dx * height + dy
+            if action != Directions.STOP: pacmanDirection = action
+            bit = 1 << pacmanCell
+            if food & bit:
+                scoreChange += 10
+                food &= ~bit
+                if not food:
+                    scoreChange += 500
+                    outcome = WIN
+            position = (pacmanCell // height, pacmanCell % height)
+            if position in self.capsulePositions:
+                i = self.capsulePositions.index(position)
+                if capsules & (1 << i):
+                    capsules &= ~(1 << i)
+                    ghosts = tuple([(x2, y2, direction, pacman.SCARED_TIME) for x2, y2, direction, timer in ghosts])
+            scoreChange -= pacman.TIME_PENALTY
+            toCheck = range(len(ghosts))
+        else:
+            x2, y2, direction, scaredTimer = ghosts[agentIndex - 1]
+            dx, dy = self.vectors[action]
+            if scaredTimer > 0:
+                x2, y2 = x2 + dx, y2 + dy
+                if scaredTimer == 1:
+                    x2, y2 = (x2 + 1) // 2 * 2, (y2 + 1) // 2 * 2
+                scaredTimer -= 1
+            else:
+                x2, y2 = x2 + 2 * dx, y2 + 2 * dy
+            ghosts = ghosts[:agentIndex - 1] + ((x2, y2, action, scaredTimer),) + ghosts[agentIndex:]
+            toCheck = [agentIndex - 1]
+
+        # GhostRules.checkDeath: collisions with Pacman within COLLISION_TOLERANCE
+        px2, py2 = pacmanCell // height * 2, pacmanCell % height * 2
+        for i in toCheck:
+            x2, y2, direction, scaredTimer = ghosts[i]
+            if abs(x2 - px2) + abs(y2 - py2) <= 2 * pacman.COLLISION_TOLERANCE:
+                if scaredTimer > 0:
+                    scoreChange += 200
+                    startX2, startY2 = self.ghostStarts[i]
+                    ghosts = ghosts[:i] + ((startX2, startY2, Directions.STOP, 0),) + ghosts[i + 1:]
+                elif outcome != WIN:
+                    scoreChange -= 500
+                    outcome = LOSE
+        return (pacmanCell, pacmanDirection, ghosts, food, capsules, score + scoreChange, outcome)
+
+def verifyAgainstGameState(layout, numGhosts=4, games=10, maxMoves=1000, seed=0):
+    """
+    Plays games of random moves in both engines from the layout's start and
+    raises an Exception at the first state where they disagree, including
+    packing and unpacking every state.  Returns the number of moves checked.
+    """
+    rand = random.Random(seed)
+    engine = PackedGame(layout, numGhosts)
+    moves = 0
+    for game in range(games):
+        gameState = pacman.GameState()
+        gameState.initialize(layout, numGhosts)
+        state = engine.getStartState()
+        for move in range(maxMoves):
+            if engine.pack(gameState) != state:
+                raise Exception('pack differs after %d moves of game %d' % (move, game))
+            if not engine.unpack(state) == gameState:
+                raise Exception('unpack differs after %d moves of game %d' % (move, game))
+            if gameState.isWin() or gameState.isLose(): break
+            agentIndex = move % gameState.getNumAgents()
+            legal = gameState.getLegalActions(agentIndex)
+            if engine.getLegalActions(state, agentIndex) != legal:
+                raise Exception('legal actions differ after %d moves of game %d' % (move, game))
+            action = rand.choice(legal)
+            gameState = gameState.generateSuccessor(agentIndex, action)
+            state = engine.generateSuccessor(state, agentIndex, action)
+            moves += 1
+    return moves
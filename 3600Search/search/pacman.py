@@ -44,10 +44,11 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
-import sys, types, time, random, os
+import sys, types, time, random, os, collections
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -72,14 +73,32 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of the states generateSuccessor has produced;
+    # by default only a count is kept (see ExploredCounter and ExploredStates)
+    explored = None
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
+        """
+        Returns the explored tracker and starts a fresh, empty one with the
+        same settings.  See ExploredCounter and ExploredStates for what len,
+        iteration and 'in' mean for each.
+        """
+        tmp = GameState.explored
+        GameState.explored = tmp.fresh()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def trackExplored( tracker ):
+        "Makes generateSuccessor report to tracker, an ExploredCounter or ExploredStates."
+        GameState.explored = tracker
+    trackExplored = staticmethod(trackExplored)
+
+    # static variable: a SuccessorCache that generateSuccessor consults, if any
+    successorCache = None
+    def useSuccessorCache( cache ):
+        "Makes generateSuccessor go through cache, a SuccessorCache, or straight to the rules for None."
+        GameState.successorCache = cache
+    useSuccessorCache = staticmethod(useSuccessorCache)
+
     def getLegalActions( self, agentIndex=0 ):
         """
         Returns the legal actions for the agent specified.
@@ -96,6 +115,14 @@ class GameState:
         """
         Returns the successor state after the specified agent takes the action.
         """
+        if GameState.successorCache != None:
+            return GameState.successorCache.generateSuccessor( self, agentIndex, action )
+        return self.computeSuccessor( agentIndex, action )
+
+    def computeSuccessor( self, agentIndex, action ):
+        """
+        Applies the rules to make the successor, bypassing any successor cache.
+        """
         # Check that successors exist
         if self.isWin() or self.isLose(): raise Exception('Can\'t generate a successor of a terminal state.')
 
@@ -112,8 +139,8 @@ class GameState:
         # Time passes
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY # Penalty for waiting around
-        else:
-            GhostRules.decrementTimer( state.data.agentStates[agentIndex] )
+        elif state.data.agentStates[agentIndex].scaredTimer > 0:
+            GhostRules.decrementTimer( state.data.writableAgentState(agentIndex) )
 
         # Resolve multi-agent effects
         GhostRules.checkDeath( state, agentIndex )
@@ -121,8 +148,7 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        GameState.explored.record(self, state)
         return state
 
     def getLegalPacmanActions( self ):
@@ -147,12 +173,14 @@ class GameState:
         return self.data.agentStates[0].getPosition()
 
     def getGhostStates( self ):
-        return self.data.agentStates[1:]
+        # AgentStates may be shared with other states until written, so hand
+        # out ones that belong to this state alone
+        return [self.data.writableAgentState( index ) for index in range( 1, self.getNumAgents() )]
 
     def getGhostState( self, agentIndex ):
         if agentIndex == 0 or agentIndex >= self.getNumAgents():
             raise Exception("Invalid index passed to getGhostState")
-        return self.data.agentStates[agentIndex]
+        return self.data.writableAgentState( agentIndex )
 
     def getGhostPosition( self, agentIndex ):
         if agentIndex == 0:
@@ -160,7 +188,7 @@ class GameState:
         return self.data.agentStates[agentIndex].getPosition()
 
     def getGhostPositions(self):
-        return [s.getPosition() for s in self.getGhostStates()]
+        return [s.getPosition() for s in self.data.agentStates[1:]]
 
     def getNumAgents( self ):
         return len( self.data.agentStates )
@@ -172,7 +200,8 @@ class GameState:
         """
         Returns a list of positions (x,y) of the remaining capsules.
         """
-        return self.data.capsules
+        # A copy: the state's own list may be shared with other states
+        return self.data.capsules[:]
 
     def getNumFood( self ):
         return self.data.food.count()
@@ -187,7 +216,8 @@ class GameState:
         currentFood = state.getFood()
         if currentFood[x][y] == True: ...
         """
-        return self.data.food
+        # A copy (O(1) for a BitGrid): the state's own Grid may be shared with other states
+        return self.data.food.copy()
 
     def getWalls(self):
         """
@@ -232,6 +262,21 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def readOnlyView( self ):
+        """
+        A copy of this state that copies nothing until it is written to, for
+        agents that mostly look at the state.  The view shares its food,
+        capsules and AgentStates with this state, and whichever of the two
+        writes first through the accessors or the GameStateData writable*
+        methods copies what it writes (see GameStateData).
+        """
+        state = GameState( self )
+        state.data._agentMoved = self.data._agentMoved
+        state.data._foodEaten = self.data._foodEaten
+        state.data._foodAdded = self.data._foodAdded
+        state.data._capsuleEaten = self.data._capsuleEaten
+        return state
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
@@ -260,6 +305,152 @@ class GameState:
 # You shouldn't need to look through the code in this section of the file. #
 ############################################################################
 
+class ExploredCounter:
+    """
+    Counts the successors GameState.generateSuccessor produces without
+    keeping (or hashing) any states.  Unlike ExploredStates, whose len() is
+    the number of distinct states kept, len() here is the number of
+    successors generated, repeats included.  Having no states, it cannot
+    be iterated over or asked whether it holds a state: both raise
+    TypeError.  Use ExploredStates (--explored all) for those.
+    """
+    def __init__( self ):
+        self.successors = 0
+
+    def record( self, parent, child ):
+        self.successors += 1
+
+    def fresh( self ):
+        return ExploredCounter()
+
+    def __len__( self ):
+        return self.successors
+
+    def __iter__( self ):
+        raise TypeError, 'ExploredCounter keeps no states; track with ExploredStates to list them'
+
+    def __contains__( self, state ):
+        raise TypeError, 'ExploredCounter keeps no states; track with ExploredStates to look them up'
+
+class ExploredStates:
+    """
+    Keeps the distinct states GameState.generateSuccessor has seen, parents
+    and successors alike.  With no capacity every state is kept for as long
+    as the tracker is; otherwise only the capacity most recently added
+    states are, the oldest being dropped first.  len() is the number of
+    states kept and successors counts every call.
+    """
+    def __init__( self, capacity=None ):
+        self.capacity = capacity
+        self.successors = 0
+        if capacity == None:
+            self.states = set()
+        else:
+            self.states = {}
+            self.order = collections.deque()
+
+    def record( self, parent, child ):
+        self.successors += 1
+        if self.capacity == None:
+            self.states.add(parent)
+            self.states.add(child)
+            return
+        for state in (parent, child):
+            if state in self.states: continue
+            self.states[state] = True
+            self.order.append(state)
+            if len(self.order) > self.capacity:
+                del self.states[self.order.popleft()]
+
+    def fresh( self ):
+        return ExploredStates(self.capacity)
+
+    def __len__( self ):
+        return len(self.states)
+
+    def __iter__( self ):
+        return iter(self.states)
+
+    def __contains__( self, state ):
+        return state in self.states
+
+GameState.trackExplored(ExploredCounter())
+
+class SuccessorCache:
+    """
+    A transposition table for GameState.generateSuccessor, keyed by the
+    parent state's hash, the agent index and the action.
+
+    Entries live in two generations of plain dictionaries.  New and reused
+    entries go into the recent one; when it holds half the capacity it
+    becomes the old one and the previous old generation is dropped.  That
+    evicts roughly the least recently used half of the table at a time,
+    keeping at most capacity successors, for one hash per lookup.
+
+    Each entry keeps a copy of its parent state, and a hit needs that copy
+    to equal the state asked about on the same layout, so a hash collision
+    can only cost a miss.  Every hit returns a new state sharing its data
+    with the cached successor, as readOnlyView does, so callers may write
+    to what they get back without reaching the table or each other.
+    """
+    def __init__( self, capacity=100000 ):
+        self.capacity = capacity
+        self.recent = {}
+        self.old = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def generateSuccessor( self, state, agentIndex, action ):
+        key = (hash(state), agentIndex, action)
+        entry = self.recent.get(key)
+        if entry == None:
+            entry = self.old.pop(key, None)
+            if entry != None: self._store(key, entry)
+        if entry != None and entry[0].data.layout is state.data.layout and entry[0] == state:
+            self.hits += 1
+            successor = self._share(entry[1])
+            GameState.explored.record(state, successor)
+            return successor
+        self.misses += 1
+        successor = state.computeSuccessor(agentIndex, action)
+        self._store(key, (state.readOnlyView(), self._share(successor)))
+        return successor
+
+    def _share( self, successor ):
+        "A copy of successor, outcome and all, that copies its data only when written."
+        state = successor.readOnlyView()
+        state.data._win = successor.data._win
+        state.data._lose = successor.data._lose
+        state.data.scoreChange = successor.data.scoreChange
+        return state
+
+    def _store( self, key, entry ):
+        recent = self.recent
+        if key not in recent and len(recent) >= max(1, self.capacity // 2):
+            self.evictions += len(self.old)
+            self.old = recent
+            self.recent = recent = {}
+        recent[key] = entry
+
+    def hitRate( self ):
+        "The fraction of lookups answered from the table."
+        lookups = self.hits + self.misses
+        if lookups == 0: return 0.0
+        return float(self.hits) / lookups
+
+    def clear( self ):
+        self.recent = {}
+        self.old = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__( self ):
+        return len(self.recent) + len(self.old)
+
+    def __str__( self ):
+        return '%d successors cached, %d hits, %d misses (%.1f%% hits), %d evicted' % \
+            (len(self), self.hits, self.misses, 100 * self.hitRate(), self.evictions)
+
 SCARED_TIME = 40    # Moves ghosts are scared
 COLLISION_TOLERANCE = 0.7 # How close ghosts must be to Pacman to kill
 TIME_PENALTY = 1 # Number of points lost each round
@@ -272,11 +463,11 @@ class ClassicGameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False):
+    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False, readOnlyObservations=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize( layout, len(ghostAgents) )
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, display, self, catchExceptions=catchExceptions, readOnlyObservations=readOnlyObservations)
         game.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
@@ -343,7 +534,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.writableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
@@ -362,8 +553,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood( position )
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -372,11 +562,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if( position in state.getCapsules() ):
-            state.data.capsules.remove( position )
+            state.data.removeCapsule( position )
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range( 1, len( state.data.agentStates ) ):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.writableAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod( consume )
 
 class GhostRules:
@@ -389,7 +579,11 @@ class GhostRules:
         Ghosts cannot stop, and cannot turn around unless they
         reach a dead end, but can turn 90 degrees at intersections.
         """
-        conf = state.getGhostState( ghostIndex ).configuration
+        conf = state.data.agentStates[ghostIndex].configuration
+        walls = state.data.layout.walls
+        table = walls.actionTable or Actions.getActionTable( walls )
+        if table != None and conf.pos in table.ghostActions:
+            return list( table.ghostActions[conf.pos][conf.direction] )
         possibleActions = Actions.getPossibleActions( conf, state.data.layout.walls )
         reverse = Actions.reverseDirection( conf.direction )
         if Directions.STOP in possibleActions:
@@ -405,7 +599,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.writableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0: speed /= 2.0
         vector = Actions.directionToVector( action, speed )
@@ -415,7 +609,8 @@ class GhostRules:
     def decrementTimer( ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint( ghostState.configuration.pos )
+            configuration = ghostState.configuration
+            ghostState.configuration = Configuration( nearestPoint( configuration.pos ), configuration.direction )
         ghostState.scaredTimer = max( 0, timer - 1 )
     decrementTimer = staticmethod( decrementTimer )
 
@@ -436,10 +631,12 @@ class GhostRules:
 
     def collide( state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
+            ghostState = state.data.writableAgentState(agentIndex)
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -524,6 +721,13 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--readOnlyObservations', action='store_true', dest='readOnlyObservations',
+                      help='Give agents read-only views of the state instead of deep copies', default=False)
+    parser.add_option('--explored', dest='explored',
+                      help=default('How GameState.explored tracks generated states: count, all, or a number to keep only that many'),
+                      default='count')
+    parser.add_option('--successorCache', dest='successorCache', type='int',
+                      help='Cache up to this many GameState successors, dropping the least recently used', default=0)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -571,6 +775,17 @@ def readCommand( argv ):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['readOnlyObservations'] = options.readOnlyObservations
+    if options.explored == 'count':
+        GameState.trackExplored(ExploredCounter())
+    elif options.explored == 'all':
+        GameState.trackExplored(ExploredStates())
+    elif options.explored.isdigit() and int(options.explored) > 0:
+        GameState.trackExplored(ExploredStates(int(options.explored)))
+    else:
+        parser.error('--explored must be count, all or a positive number of states, not ' + repr(options.explored))
+    if options.successorCache > 0:
+        GameState.useSuccessorCache(SuccessorCache(options.successorCache))
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -626,7 +841,7 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, readOnlyObservations=False ):
     import __main__
     __main__.__dict__['_display'] = display
 
@@ -643,7 +858,7 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
         else:
             gameDisplay = display
             rules.quiet = False
-        game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
+        game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions, readOnlyObservations)
         game.run()
         if not beQuiet: games.append(game)
 
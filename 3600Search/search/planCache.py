@@ -0,0 +1,146 @@
+# planCache.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A cache of solved search plans, so that playing the same layout again (in
+the same process with -n, or in a later run) does not repeat the search.
+
+Plans are keyed by planKey(): a fingerprint of the walls, food and capsules,
+Pacman's start position, the names of the problem type, search function
+and heuristic, and a fingerprint of the code of the modules defining them
+(see codeFingerprint), so editing search.py or searchAgents.py retires the
+plans made by the old code.  Recently used plans are kept in memory; when
+a directory is given they are also pickled to disk, one file per plan:
+
+> python pacman.py -l bigMaze -p SearchAgent -a fn=bfs,cacheDir=.plans -n 10
+"""
+import os
+import sys
+import types
+import cPickle
+import hashlib
+from collections import OrderedDict
+
+def layoutFingerprint(state):
+    "A digest of the parts of a GameState that search problems are built from."
+    data = (state.getWalls().packBits(), state.getFood().packBits(), tuple(sorted(state.getCapsules())))
+    return hashlib.sha1(repr(data)).hexdigest()
+
+# Bump to retire every stored plan, e.g. when the plan format changes
+CACHE_VERSION = 1
+
+def codeFingerprint(*objects):
+    """
+    A digest of the bytecode of every function and class method in the
+    modules that define the given functions and classes, so that helpers
+    they call are covered too.
+    """
+    digest = hashlib.sha1(str(CACHE_VERSION))
+    def addCode(code):
+        digest.update(code.co_code)
+        for const in code.co_consts:
+            if type(const) == type(code): addCode(const)
+            else: digest.update(repr(const))
+    def addFunction(name, function):
+        if 'func_code' in dir(function):
+            digest.update(name)
+            addCode(function.func_code)
+    moduleNames = sorted(set([o.__module__ for o in objects if o != None]))
+    for moduleName in moduleNames:
+        module = sys.modules[moduleName]
+        for name, value in sorted(vars(module).items()):
+            if getattr(value, '__module__', None) != moduleName: continue
+            addFunction(name, value)
+            if type(value) in (types.ClassType, types.TypeType):
+                for attribute, member in sorted(vars(value).items()):
+                    addFunction(name + '.' + attribute, member)
+    return digest.hexdigest()
+
+def planKey(state, fn, prob, heuristic=None, code=None):
+    return (layoutFingerprint(state), state.getPacmanPosition(), prob, fn, heuristic, code)
+
+class PlanCache:
+    """
+    A two-tier plan store: an in-memory LRU of up to capacity plans in front
+    of an optional directory of pickled plans.
+    """
+    def __init__(self, capacity=128, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self.plans = OrderedDict()
+        self.hits, self.diskHits, self.misses = 0, 0, 0
+        if directory != None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get(self, key):
+        "Returns a copy of the cached actions for key, or None."
+        if key in self.plans:
+            actions = self.plans.pop(key)
+            self.plans[key] = actions
+            self.hits += 1
+            return list(actions)
+        actions = self._load(key)
+        if actions != None:
+            self._remember(key, actions)
+            self.diskHits += 1
+            return list(actions)
+        self.misses += 1
+        return None
+
+    def put(self, key, actions):
+        actions = tuple(actions)
+        self._remember(key, actions)
+        self._store(key, actions)
+
+    def _remember(self, key, actions):
+        self.plans.pop(key, None)
+        self.plans[key] = actions
+        while len(self.plans) > self.capacity:
+            self.plans.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key)).hexdigest() + '.plan')
+
+    def _load(self, key):
+        if self.directory == None: return None
+        path = self._path(key)
+        if not os.path.exists(path): return None
+        f = open(path, 'rb')
+        try:
+            storedKey, actions = cPickle.load(f)
+        except Exception:
+            return None
+        finally:
+            f.close()
+        if storedKey != key: return None
+        return actions
+
+    def _store(self, key, actions):
+        if self.directory == None: return
+        path = self._path(key)
+        # Write then rename so a concurrent reader never sees half a plan
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        f = open(tmp, 'wb')
+        try: cPickle.dump((key, actions), f, 2)
+        finally: f.close()
+        os.rename(tmp, path)
+
+_PLAN_CACHES = {}
+
+def getPlanCache(directory=None):
+    "Returns the process-wide PlanCache for a directory (None for memory only)."
+    if directory not in _PLAN_CACHES:
+        _PLAN_CACHES[directory] = PlanCache(directory=directory)
+    return _PLAN_CACHES[directory]
@@ -19,6 +19,8 @@ by Pacman agents (in searchAgents.py).
 """
 
 import util
+from game import Grid, BitGrid
+from collections import OrderedDict
 
 class SearchProblem:
     """
@@ -63,6 +65,68 @@ class SearchProblem:
         """
         util.raiseNotDefined()
 
+class MemoizedSearchProblem(SearchProblem):
+    """
+    Wraps any SearchProblem and remembers the successors of the most recently
+    expanded states (up to capacity of them, least recently used first out),
+    so re-expanding a state does not rebuild its successors.
+
+    Every call to getSuccessors still counts as an expansion: on a cache hit
+    the wrapped problem's _expanded is incremented just as if it had been
+    called.  Other attributes (walls, heuristicInfo, _expanded, ...) are read
+    from the wrapped problem, so heuristics can be handed the wrapper.
+
+    hits, misses and evictions count cache lookups and dropped entries.
+    """
+    def __init__(self, problem, capacity=10000):
+        self.problem = problem
+        self.capacity = capacity
+        self.successors = OrderedDict()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def __getattr__(self, name):
+        if name == 'problem': raise AttributeError, name
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state)
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+    def getSuccessors(self, state):
+        key = memoKey(state)
+        if key in self.successors:
+            successors = self.successors.pop(key)
+            self.successors[key] = successors
+            self.hits += 1
+            if '_expanded' in dir(self.problem): self.problem._expanded += 1
+            return list(successors)
+        self.misses += 1
+        successors = tuple(self.problem.getSuccessors(state))
+        self.successors[key] = successors
+        if len(self.successors) > self.capacity:
+            self.successors.popitem(last=False)
+            self.evictions += 1
+        return list(successors)
+
+def memoKey(state):
+    """
+    A hashable key for a search state.  Lists (as in CornersProblem) become
+    tuples, BitGrids become their int and Grids become tuples of their
+    columns, which hash much faster than Grid.__hash__.
+    """
+    if type(state) == list or type(state) == tuple:
+        return tuple([memoKey(part) for part in state])
+    if isinstance(state, BitGrid):
+        return state.bits
+    if isinstance(state, Grid):
+        return tuple(map(tuple, state.data))
+    return state
+
 
 def tinyMazeSearch(problem):
     """
@@ -40,7 +40,12 @@ from game import Agent
 from game import Actions
 import util
 import time
+import random
+import heapq
 import search
+from array import array
+import mazeGraph
+import planCache
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -68,11 +73,15 @@ class SearchAgent(Agent):
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
 
+    Plans are remembered in a planCache (see planCache.py), so replaying the
+    same layout skips the search.  Pass cacheDir=<directory> to also keep
+    plans on disk between runs.
+
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', cacheDir=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -82,6 +91,7 @@ class SearchAgent(Agent):
         if 'heuristic' not in func.func_code.co_varnames:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
+            heuristic = None
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -99,6 +109,12 @@ class SearchAgent(Agent):
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
 
+        # Only agents configured by name can share cached plans
+        heuristicFunction = None
+        if 'heuristic' in func.func_code.co_varnames: heuristicFunction = heur
+        self.planNames = (fn, prob, heuristic, planCache.codeFingerprint(func, heuristicFunction, self.searchType))
+        self.planCache = planCache.getPlanCache(cacheDir)
+
     def registerInitialState(self, state):
         """
         This is the first time that the agent sees the layout of the game board. Here, we
@@ -109,11 +125,22 @@ class SearchAgent(Agent):
         """
         if self.searchFunction == None: raise Exception, "No search function provided for SearchAgent"
         starttime = time.time()
+        self.actionIndex = 0
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        key = None
+        if 'planNames' in dir(self):
+            key = planCache.planKey(state, *self.planNames)
+            cached = self.planCache.get(key)
+            if cached != None and problem.getCostOfActions(cached) < 999999:
+                self.actions = cached
+                totalCost = problem.getCostOfActions(self.actions)
+                print('Path loaded from plan cache with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
+                return
+        self.actions  = expandMacroActions(self.searchFunction(problem)) # Find a path
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if key != None and self.actions != None: self.planCache.put(key, self.actions)
 
     def getAction(self, state):
         """
@@ -141,18 +168,23 @@ class PositionSearchProblem(search.SearchProblem):
     Note: this search problem is fully specified; you should NOT change it.
     """
 
-    def __init__(self, gameState, costFn = lambda x: 1, goal=(1,1), start=None, warn=True, visualize=True):
+    def __init__(self, gameState, costFn = None, goal=(1,1), start=None, warn=True, visualize=True):
         """
         Stores the start and goal.
 
         gameState: A GameState object (pacman.py)
-        costFn: A function from a search state (tuple) to a non-negative number
+        costFn: A function from a search state (tuple) to a non-negative number;
+                None means every step costs 1
         goal: A position in the gameState
+        visualize: Whether to record expanded cells for the display
         """
         self.walls = gameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
+        self.unitCost = costFn == None
+        if costFn == None: costFn = lambda x: 1
         self.costFn = costFn
         self.visualize = visualize
         if warn and (gameState.getNumFood() != 1 or not gameState.hasFood(*goal)):
@@ -188,20 +220,17 @@ class PositionSearchProblem(search.SearchProblem):
          required to get there, and 'stepCost' is the incremental
          cost of expanding to that successor
         """
-
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        x,y = state
+        cell = x * self.graph.height + y
+        if self.unitCost:
+            successors = list(self.graph.unitSuccessors[cell])
+        else:
+            costFn = self.costFn
+            successors = [(nextState, action, costFn(nextState)) for nextState, action in self.graph.moves[cell]]
 
         # Bookkeeping for display purposes
         self._expanded += 1
-        if state not in self._visited:
+        if self.visualize and state not in self._visited:
             self._visited[state] = True
             self._visitedlist.append(state)
 
@@ -223,6 +252,10 @@ class PositionSearchProblem(search.SearchProblem):
             cost += self.costFn((x,y))
         return cost
 
+    def distances(self, sources, targets):
+        "The maze distance matrix from sources to targets (see MazeGraph.distances)."
+        return self.graph.distances(sources, targets)
+
 class StayEastSearchAgent(SearchAgent):
     """
     An agent for position search with a cost function that penalizes being in
@@ -259,6 +292,190 @@ def euclideanHeuristic(position, problem, info={}):
     xy2 = problem.goal
     return ( (xy1[0] - xy2[0]) ** 2 + (xy1[1] - xy2[1]) ** 2 ) ** 0.5
 
+def landmarkHeuristic(position, problem, info={}):
+    """
+    An ALT (landmark) lower bound on the maze distance to problem.goal.  The
+    landmark distance arrays are built once per layout (see mazeGraph.py).
+    Taking the max with the Manhattan distance keeps it admissible and never
+    weaker than manhattanHeuristic.
+    """
+    table = mazeGraph.getLandmarkTable(problem.walls)
+    graph = table.graph
+    bound = table.lowerBound(graph.cell(position), graph.cell(problem.goal))
+    return max(bound, manhattanHeuristic(position, problem))
+
+class LRTAStarAgent(Agent):
+    """
+    A real-time search agent (RTAA*, a variant of LRTA*).  Instead of planning
+    the whole path in registerInitialState, every call to getAction runs an A*
+    lookahead of at most `lookahead` expansions from the current search state,
+    raises the heuristic of every state it expanded to f(best frontier) - g,
+    and takes the first step towards the best frontier state.
+
+    The learned heuristic values are kept per layout and problem type in
+    LRTAStarAgent.learnedHeuristics, so later games on the same layout reuse
+    (and keep improving) them.  Each lookahead also stops after moveFraction
+    of the move timeout the game rules allow (see setMoveTimeout).
+
+    > python pacman.py -l bigMaze -p LRTAStarAgent -a lookahead=20 -z .5
+    """
+    learnedHeuristics = {}
+
+    def __init__(self, prob='PositionSearchProblem', heuristic='manhattanHeuristic', lookahead=100, moveFraction=0.5):
+        Agent.__init__(self)
+        if prob not in globals().keys() or not prob.endswith('Problem'):
+            raise AttributeError, prob + ' is not a search problem type in SearchAgents.py.'
+        if heuristic in globals().keys():
+            self.heuristic = globals()[heuristic]
+        elif heuristic in dir(search):
+            self.heuristic = getattr(search, heuristic)
+        else:
+            raise AttributeError, heuristic + ' is not a function in searchAgents.py or search.py.'
+        self.searchType = globals()[prob]
+        self.problemName = prob
+        self.lookahead = max(1, int(lookahead))
+        self.moveFraction = float(moveFraction)
+        self.moveTimeout = None
+
+    def setMoveTimeout(self, seconds):
+        "Called by Game.run with the per-move time limit of the game rules."
+        self.moveTimeout = seconds
+
+    def registerInitialState(self, state):
+        self.problem = self.searchType(state)
+        self.current = self.problem.getStartState()
+        key = (planCache.layoutFingerprint(state), state.getPacmanPosition(), self.problemName)
+        if key not in LRTAStarAgent.learnedHeuristics:
+            LRTAStarAgent.learnedHeuristics[key] = {}
+        self.learned = LRTAStarAgent.learnedHeuristics[key]
+        self.moves = 0
+
+    def getAction(self, state):
+        if self.problem.isGoalState(self.current): return Directions.STOP
+        deadline = None
+        if self.moveTimeout != None:
+            deadline = time.time() + self.moveFraction * self.moveTimeout
+        action, nextState = self.lookaheadStep(self.current, deadline)
+        if action == None: return Directions.STOP
+        self.current = nextState
+        self.moves += 1
+        return action
+
+    def estimate(self, state, key):
+        if key in self.learned: return self.learned[key]
+        return self.heuristic(state, self.problem)
+
+    def lookaheadStep(self, start, deadline):
+        """
+        Runs the bounded A* lookahead from start, updates the learned heuristic
+        and returns (action, successor) for the first step towards the most
+        promising frontier state, or (None, None) if no goal is reachable.
+        """
+        problem = self.problem
+        startKey = stateKey(start)
+        frontier = util.PriorityQueue()
+        frontier.push((start, startKey, 0, None, None), self.estimate(start, startKey))
+        bestG = {startKey: 0}
+        closed = {}
+        best = None
+        while not frontier.isEmpty():
+            node = frontier.pop()
+            state, key, g, firstAction, firstState = node
+            if g > bestG[key]: continue
+            if problem.isGoalState(state) or len(closed) >= self.lookahead or \
+               (deadline != None and time.time() > deadline and len(closed) > 0):
+                best = node
+                break
+            closed[key] = g
+            for nextState, action, cost in problem.getSuccessors(state):
+                nextKey = stateKey(nextState)
+                nextG = g + cost
+                if nextKey not in bestG or nextG < bestG[nextKey]:
+                    bestG[nextKey] = nextG
+                    if firstAction == None:
+                        entry = (nextState, nextKey, nextG, action, nextState)
+                    else:
+                        entry = (nextState, nextKey, nextG, firstAction, firstState)
+                    frontier.push(entry, nextG + self.estimate(nextState, nextKey))
+        if best == None: return None, None
+
+        # RTAA* update: every expanded state is at least f(best) - g away from a goal
+        state, key, g, firstAction, firstState = best
+        f = g + self.estimate(state, key)
+        for closedKey, closedG in closed.items():
+            self.learned[closedKey] = max(self.learned.get(closedKey, 0), f - closedG)
+        return firstAction, firstState
+
+def stateKey(state):
+    "A hashable version of a search state (CornersProblem states are lists)."
+    if type(state) == list or type(state) == tuple:
+        return tuple([stateKey(part) for part in state])
+    return state
+
+class HierarchicalSearchAgent(Agent):
+    """
+    Plans the route to the PositionSearchProblem goal on the layout's HPA*
+    abstract graph (see hierarchicalSearch.py) and only refines the next leg
+    of the abstract path into single moves when the previous leg is used up.
+
+    > python pacman.py -l bigMaze -p HierarchicalSearchAgent -a clusterSize=8 -z .5
+    """
+    def __init__(self, clusterSize=10):
+        Agent.__init__(self)
+        self.clusterSize = int(clusterSize)
+
+    def registerInitialState(self, state):
+        import hierarchicalSearch
+        starttime = time.time()
+        problem = PositionSearchProblem(state, warn=False, visualize=False)
+        self.hierarchy = hierarchicalSearch.getHierarchicalMap(state.getWalls(), self.clusterSize)
+        self.path = self.hierarchy.abstractPath(problem.getStartState(), problem.goal)
+        if self.path == None: self.path = []
+        self.leg = 0
+        self.actions = []
+        print 'Abstract path of %d legs found in %.4f seconds' % (max(0, len(self.path) - 1), time.time() - starttime)
+
+    def getAction(self, state):
+        while not self.actions and self.leg + 1 < len(self.path):
+            self.actions = self.hierarchy.refine(self.path[self.leg], self.path[self.leg + 1])
+            self.leg += 1
+        if not self.actions: return Directions.STOP
+        return self.actions.pop(0)
+
+class SpaceTimeSearchAgent(Agent):
+    """
+    Eats the food while avoiding the ghosts.  Every move it predicts where
+    each ghost may be over the next `horizon` moves from a model ghost agent
+    (`ghost`, any agent in ghostAgents.py), reserves the likely ghost slots
+    and replans with space-time A* (see spaceTimeSearch.py).
+
+    > python pacman.py -l mediumClassic -p SpaceTimeSearchAgent -a ghost=DirectionalGhost -g DirectionalGhost
+    """
+    def __init__(self, ghost='RandomGhost', horizon=12, riskWeight=30, blockThreshold=0.3, deterministic=False):
+        Agent.__init__(self)
+        self.ghost = ghost
+        self.horizon = int(horizon)
+        self.riskWeight = float(riskWeight)
+        self.blockThreshold = float(blockThreshold)
+        self.deterministic = str(deterministic) == 'True'
+
+    def registerInitialState(self, state):
+        import ghostAgents
+        if self.ghost not in dir(ghostAgents):
+            raise AttributeError, self.ghost + ' is not a ghost agent in ghostAgents.py.'
+        self.ghostModels = [getattr(ghostAgents, self.ghost)(index) for index in range(1, state.getNumAgents())]
+
+    def getAction(self, state):
+        import spaceTimeSearch
+        goals = state.getFood().asList() + state.getCapsules()
+        if not goals: return Directions.STOP
+        occupancy = spaceTimeSearch.predictGhostOccupancy(state, self.ghostModels, self.horizon, self.deterministic)
+        reservations = spaceTimeSearch.ReservationTable(occupancy, self.blockThreshold)
+        problem = spaceTimeSearch.SpaceTimeSearchProblem(state, goals, reservations, self.riskWeight)
+        actions = spaceTimeSearch.spaceTimeAStar(problem)
+        if actions: return actions[0]
+        return problem.safestAction()
+
 #####################################################
 # This portion is incomplete.  Time to write code!  #
 #####################################################
@@ -275,6 +492,7 @@ class CornersProblem(search.SearchProblem):
         Stores the walls, pacman's starting position and corners.
         """
         self.walls = startingGameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startingPosition = startingGameState.getPacmanPosition()
         top, right = self.walls.height-2, self.walls.width-2
         self.corners = ((1,1), (1,top), (right, 1), (right, top))
@@ -310,25 +528,16 @@ class CornersProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   nextx, nexty = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[nextx][nexty]
+        x, y = state[0]
+        # The legal moves out of each cell come from the layout's shared MazeGraph
+        for nextPosition, action in self.graph.moves[x * self.graph.height + y]:
             "*** YOUR CODE HERE ***"
-            x, y = state[0]
-
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = [(nextx, nexty), state[1][:]]
-                if (nextx, nexty) in self.corners:
-                    for index, corner in enumerate(self.corners):
-                        if (nextx, nexty) == corner:  
-                            nextState[1][index] = 1
-                successors.append((nextState, action, 1))   
+            nextState = [nextPosition, state[1][:]]
+            if nextPosition in self.corners:
+                for index, corner in enumerate(self.corners):
+                    if nextPosition == corner:
+                        nextState[1][index] = 1
+            successors.append((nextState, action, 1))
         self._expanded += 1
         return successors
 
@@ -345,6 +554,10 @@ class CornersProblem(search.SearchProblem):
             if self.walls[x][y]: return 999999
         return len(actions)
 
+    def distances(self, sources, targets):
+        "The maze distance matrix from sources to targets (see MazeGraph.distances)."
+        return self.graph.distances(sources, targets)
+
 
 def cornersHeuristic(state, problem):
     """
@@ -401,6 +614,7 @@ class FoodSearchProblem:
     def __init__(self, startingGameState):
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startingGameState = startingGameState
         self._expanded = 0
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -439,6 +653,138 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+    def distances(self, sources, targets):
+        "The maze distance matrix from sources to targets (see MazeGraph.distances)."
+        return self.graph.distances(sources, targets)
+
+class PrunedFoodSearchProblem(FoodSearchProblem):
+    """
+    A FoodSearchProblem that prunes states A* does not need, using the same
+    states, actions and costs:
+
+      symmetry:  a state whose mirror image under a symmetry of the walls
+                 (mazeGraph.getSymmetries) has already been expanded at no
+                 greater cost is skipped, as its solutions are mirrors of ones
+                 already being searched.
+      dominance: a state is skipped when a state at the same position with a
+                 subset of its food has already been expanded at no greater
+                 cost.
+
+    Expanded states are recorded per position as (food bitmask, cost), and
+    _pruned counts the states skipped (not counting exact repeats).  The
+    costs are the cheapest seen for each state, which is the cost A* expands
+    it at when the heuristic is consistent.
+
+    > python pacman.py -l openSearch -p SearchAgent -a fn=astar,prob=PrunedFoodSearchProblem,heuristic=foodHeuristic
+    """
+    def __init__(self, startingGameState, symmetry=True, dominance=True):
+        FoodSearchProblem.__init__(self, startingGameState)
+        if symmetry:
+            self.symmetries = mazeGraph.getSymmetries(self.walls)
+        else:
+            self.symmetries = mazeGraph.getSymmetries(self.walls)[:1]
+        self.dominance = dominance
+        self.bestCost = {self._key(self.start): 0}
+        self.expanded = set()
+        self.records = {}
+        self._pruned = 0
+
+    def _key(self, state):
+        position, food = state
+        mask = 0
+        for x, y in food.asList():
+            mask |= 1 << (x * food.height + y)
+        return (self.graph.cell(position), mask)
+
+    def _isPruned(self, cell, mask, cost):
+        "True if some image of (cell, mask) is covered by an expanded record."
+        for perm in self.symmetries:
+            image = self._permuteMask(mask, perm)
+            for recordMask, recordCost in self.records.get(perm[cell], ()):
+                if recordCost > cost: continue
+                if recordMask == image or (self.dominance and recordMask & ~image == 0):
+                    return True
+        return False
+
+    def _permuteMask(self, mask, perm):
+        if perm is self.symmetries[0]: return mask
+        image = 0
+        while mask:
+            low = mask & -mask
+            image |= 1 << perm[low.bit_length() - 1]
+            mask ^= low
+        return image
+
+    def getSuccessors(self, state):
+        cell, mask = self._key(state)
+        cost = self.bestCost.get((cell, mask), 0)
+        if (cell, mask) in self.expanded: return []
+        if self._isPruned(cell, mask, cost):
+            self._pruned += 1
+            return []
+        self.expanded.add((cell, mask))
+        self.records.setdefault(cell, []).append((mask, cost))
+        successors = []
+        for successor in FoodSearchProblem.getSuccessors(self, state):
+            nextState, action, stepCost = successor
+            nextCell = self.graph.cell(nextState[0])
+            nextMask = mask & ~(1 << nextCell)
+            nextCost = cost + stepCost
+            if nextCost < self.bestCost.get((nextCell, nextMask), mazeGraph.INFINITY):
+                self.bestCost[(nextCell, nextMask)] = nextCost
+            if (nextCell, nextMask) in self.expanded: continue
+            if self._isPruned(nextCell, nextMask, nextCost):
+                self._pruned += 1
+                continue
+            successors.append(successor)
+        return successors
+
+class CorridorFoodSearchProblem(FoodSearchProblem):
+    """
+    A FoodSearchProblem whose successors jump straight along corridors.
+    Between decision points (junctions, dead ends and cells with food) Pacman
+    can only go on or turn back, and turning back in an empty corridor never
+    helps, so each successor follows one exit to the next decision point in
+    a single step costing the number of moves taken.
+
+    Actions are macro-actions, tuples of Directions; SearchAgent expands them
+    back into single moves (see expandMacroActions).
+
+    > python pacman.py -l trickySearch -p SearchAgent -a fn=astar,prob=CorridorFoodSearchProblem,heuristic=foodHeuristic
+    """
+    def __init__(self, startingGameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        self.corridors = mazeGraph.getCorridors(self.walls)
+
+    def getSuccessors(self, state):
+        "Returns successor states, the macro-actions reaching them, and their lengths."
+        successors = []
+        self._expanded += 1
+        position, food = state
+        cell = self.graph.cell(position)
+        for cells, actions in self.corridors[cell]:
+            for i in range(len(cells)):
+                x, y = self.graph.position(cells[i])
+                if food[x][y]: break
+            if cells[i] == cell and not food[x][y]: continue
+            nextFood = food.copy()
+            nextFood[x][y] = False
+            successors.append((((x, y), nextFood), actions[:i + 1], i + 1))
+        return successors
+
+    def getCostOfActions(self, actions):
+        if actions == None: return 999999
+        return FoodSearchProblem.getCostOfActions(self, expandMacroActions(actions))
+
+def expandMacroActions(actions):
+    "Flattens a plan in which some actions are tuples of Directions."
+    if actions == None: return None
+    expanded = []
+    for action in actions:
+        if type(action) == tuple: expanded.extend(action)
+        else: expanded.append(action)
+    return expanded
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
@@ -526,22 +872,191 @@ def foodHeuristic(state, problem):
                 minToDiagonal = distance
     return totalDisdance + minToDiagonal
 
+class FoodPatternDatabase:
+    """
+    Exact food-collecting costs for small groups of dots.
+
+    The starting food is split into groups of at most groupSize dots.  For
+    each group, costs[cell * 2**n + mask] is the length of the shortest walk
+    from cell that visits every dot of the group in mask (bit i is the
+    group's i-th dot), with maze distances.  Each group's cost is exact in a
+    problem where only its own dots matter, so it never overestimates, and
+    the maximum over the groups is still admissible and consistent.
+    """
+    def __init__(self, walls, food, groupSize=8):
+        self.graph = mazeGraph.getMazeGraph(walls)
+        self.groups = []
+        self.costs = []
+        dots = food.asList()
+        distances = dict([(dot, self.graph.bfsDistances(self.graph.cell(dot))) for dot in dots])
+        while dots:
+            # Grow each group from the first remaining dot by adding its nearest dots
+            seed = dots[0]
+            dots.sort(key=lambda dot: (distances[seed][self.graph.cell(dot)], dot))
+            group, dots = dots[:groupSize], dots[groupSize:]
+            self.groups.append(group)
+            self.costs.append(self._buildGroup(group, distances))
+
+    def _buildGroup(self, group, distances):
+        n = len(group)
+        numMasks = 1 << n
+        between = [[distances[a][self.graph.cell(b)] for b in group] for a in group]
+        # tour[mask][i]: shortest walk from dot i through the dots in mask (not holding i)
+        tour = [[0] * n for mask in range(numMasks)]
+        for mask in sorted(range(1, numMasks), key=lambda mask: bin(mask).count('1')):
+            for i in range(n):
+                if mask & (1 << i): continue
+                tour[mask][i] = min([between[i][j] + tour[mask & ~(1 << j)][j] for j in range(n) if mask & (1 << j)])
+        costs = array('i', [0] * (len(self.graph.neighbors) * numMasks))
+        for cell in self.graph.openCells():
+            fromCell = [distances[dot][cell] for dot in group]
+            base = cell * numMasks
+            for mask in range(1, numMasks):
+                costs[base + mask] = min(min([fromCell[j] + tour[mask & ~(1 << j)][j] for j in range(n) if mask & (1 << j)]), mazeGraph.INFINITY)
+        return costs
+
+    def memoryBytes(self):
+        return sum([costs.itemsize * len(costs) for costs in self.costs])
+
+    def lowerBound(self, position, foodGrid):
+        cell = self.graph.cell(position)
+        best = 0
+        for group, costs in zip(self.groups, self.costs):
+            mask = 0
+            for i in range(len(group)):
+                x, y = group[i]
+                if foodGrid[x][y]: mask |= 1 << i
+            cost = costs[(cell << len(group)) + mask]
+            if cost > best: best = cost
+        return best
+
+def patternDatabaseHeuristic(state, problem):
+    """
+    A FoodSearchProblem heuristic read from a FoodPatternDatabase built from
+    the problem's starting food (kept in problem.heuristicInfo).
+    """
+    if 'patternDatabase' not in problem.heuristicInfo:
+        problem.heuristicInfo['patternDatabase'] = FoodPatternDatabase(problem.walls, problem.start[1])
+    return problem.heuristicInfo['patternDatabase'].lowerBound(state[0], state[1])
+
 
 
+class FoodDistanceField:
+    """
+    A multi-source distance field over the open cells of a layout.  For every
+    cell it stores the maze distance to the nearest remaining dot and which dot
+    that is (its owner).
+
+    Cells are numbered x * height + y, the same order Grid uses for packBits.
+    Eating a dot only repairs the cells that dot owned: their distances are
+    reset and re-grown from the surrounding cells, whose values are still exact
+    because removing a dot can never make another dot closer.
+    """
+    INFINITY = mazeGraph.INFINITY
+
+    def __init__(self, walls, food):
+        self.graph = mazeGraph.getMazeGraph(walls)
+        self.height = walls.height
+        numCells = walls.width * walls.height
+        self.neighbors = self.graph.neighbors
+        self.dist = [self.INFINITY] * numCells
+        self.owner = [-1] * numCells
+        self.foodMask = 0
+        frontier = []
+        for x, y in food.asList():
+            cell = x * walls.height + y
+            self.foodMask |= 1 << cell
+            self.dist[cell] = 0
+            self.owner[cell] = cell
+            frontier.append(cell)
+        self._grow(frontier)
+
+    def _grow(self, frontier):
+        "Breadth-first expansion from cells whose distances are already final."
+        dist, owner, neighbors = self.dist, self.owner, self.neighbors
+        while frontier:
+            nextFrontier = []
+            for cell in frontier:
+                d = dist[cell] + 1
+                for nextCell, direction in neighbors[cell]:
+                    if d < dist[nextCell]:
+                        dist[nextCell] = d
+                        owner[nextCell] = owner[cell]
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+
+    def removeFood(self, cell):
+        "Marks the dot at cell as eaten and repairs the cells it was closest to."
+        self.foodMask &= ~(1 << cell)
+        dist, owner, neighbors = self.dist, self.owner, self.neighbors
+        region = self._region(cell)
+        for c in region:
+            dist[c] = self.INFINITY
+            owner[c] = -1
+        # Seed the region from its boundary, then settle it in distance order
+        heap = []
+        for c in region:
+            for nextCell, direction in neighbors[c]:
+                if owner[nextCell] != -1 and dist[nextCell] + 1 < dist[c]:
+                    dist[c] = dist[nextCell] + 1
+                    owner[c] = owner[nextCell]
+            if owner[c] != -1:
+                heapq.heappush(heap, (dist[c], c))
+        while heap:
+            d, c = heapq.heappop(heap)
+            if d > dist[c]: continue
+            for nextCell, direction in neighbors[c]:
+                if d + 1 < dist[nextCell]:
+                    dist[nextCell] = d + 1
+                    owner[nextCell] = owner[c]
+                    heapq.heappush(heap, (d + 1, nextCell))
+
+    def _region(self, source):
+        "The cells owned by source; owned regions are connected through source."
+        owner, neighbors = self.owner, self.neighbors
+        region, frontier = [source], [source]
+        seen = set(frontier)
+        while frontier:
+            nextFrontier = []
+            for cell in frontier:
+                for nextCell, direction in neighbors[cell]:
+                    if nextCell not in seen and owner[nextCell] == source:
+                        seen.add(nextCell)
+                        region.append(nextCell)
+                        nextFrontier.append(nextCell)
+            frontier = nextFrontier
+        return region
+
+    def pathToClosestDot(self, cell):
+        """
+        Returns (actions, dotCell) leading downhill from cell to its closest
+        dot, or (None, None) if no remaining dot is reachable.
+        """
+        if self.dist[cell] >= self.INFINITY: return None, None
+        return self.graph.walkDownhill(self.dist, cell)
+
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
+        """
+        Plans the whole tour on a (pacman cell, food bitmask) state using an
+        incrementally repaired FoodDistanceField, rather than running a fresh
+        search per dot and replaying every move through GameState.
+        """
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+        walls = state.getWalls()
+        field = FoodDistanceField(walls, state.getFood())
+        x, y = state.getPacmanPosition()
+        cell = x * walls.height + y
+        if field.foodMask & (1 << cell):
+            field.removeFood(cell)
+        while field.foodMask:
+            nextPathSegment, cell = field.pathToClosestDot(cell)
+            if nextPathSegment == None:
+                print 'Warning: some food cannot be reached'
+                break
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception, 'findPathToClosestDot returned an illegal move: %s!\n%s' % t
-                currentState = currentState.generateSuccessor(0, action)
+            field.removeFood(cell)
         self.actionIndex = 0
         print 'Path found with cost %d.' % len(self.actions)
 
@@ -578,8 +1093,11 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
+        self.unitCost = True
+        self.visualize = False
         self._visited, self._visitedlist, self._expanded = {}, [], 0
 
     def isGoalState(self, state):
@@ -596,12 +1114,179 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 # Mini-contest 1 #
 ##################
 
+class FoodTourPlanner:
+    """
+    An anytime planner for the order in which to eat the dots.
+
+    Node 0 is Pacman's starting cell and nodes 1..n are the reachable dots;
+    matrix[i][j] is the maze distance between nodes i and j.  A tour is an
+    open path [0, ...] through every node.  improvedTours seeds the tour with
+    nearest-neighbour and then yields each improvement found by 2-opt and
+    Or-opt passes, kicking the tour out of each local optimum it reaches,
+    until the deadline passes.
+    """
+
+    def __init__(self, walls, start, food):
+        self.graph = mazeGraph.getMazeGraph(walls)
+        self.neighbors = self.graph.neighbors
+        x, y = start
+        startCell = x * walls.height + y
+        self.distances = [self.graph.bfsDistances(startCell)]
+        self.cells = [startCell]
+        for x, y in food.asList():
+            cell = x * walls.height + y
+            if cell == startCell or self.distances[0][cell] >= mazeGraph.INFINITY: continue
+            self.cells.append(cell)
+            self.distances.append(self.graph.bfsDistances(cell))
+        self.matrix = [[dist[cell] for cell in self.cells] for dist in self.distances]
+        self.random = random.Random(0)
+
+    def tourCost(self, tour):
+        matrix = self.matrix
+        return sum([matrix[tour[i]][tour[i + 1]] for i in range(len(tour) - 1)])
+
+    def nearestNeighborTour(self):
+        matrix = self.matrix
+        tour = [0]
+        remaining = set(range(1, len(self.cells)))
+        while remaining:
+            row = matrix[tour[-1]]
+            nearest = min(remaining, key=lambda node: (row[node], node))
+            remaining.remove(nearest)
+            tour.append(nearest)
+        return tour
+
+    def improvedTours(self, deadline):
+        """
+        Yields (cost, tour) for the nearest-neighbour seed and then for every
+        tour that improves on the previous one.
+        """
+        tour = self.nearestNeighborTour()
+        bestCost, bestTour = self.tourCost(tour), tour[:]
+        yield bestCost, bestTour[:]
+        while time.time() < deadline:
+            while time.time() < deadline:
+                if not (self._twoOpt(tour, deadline) or self._orOpt(tour, deadline)): break
+            cost = self.tourCost(tour)
+            if cost < bestCost:
+                bestCost, bestTour = cost, tour[:]
+                yield bestCost, bestTour[:]
+            if len(tour) < 4: break
+            # Escape the local optimum by swapping two random segments
+            tour = bestTour[:]
+            a, b, c = sorted(self.random.sample(range(1, len(tour) + 1), 3))
+            tour[a:c] = tour[b:c] + tour[a:b]
+
+    def _twoOpt(self, tour, deadline):
+        "Reverses tour[i..j] whenever that shortens the path; returns whether anything changed."
+        matrix = self.matrix
+        last = len(tour) - 1
+        changed = False
+        for i in range(1, last):
+            if time.time() > deadline: break
+            a, b = tour[i - 1], tour[i]
+            rowA, rowB = matrix[a], matrix[b]
+            for j in range(i + 1, last + 1):
+                c = tour[j]
+                delta = rowA[c] - rowA[b]
+                if j < last:
+                    e = tour[j + 1]
+                    delta += rowB[e] - matrix[c][e]
+                if delta < 0:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    b = tour[i]
+                    rowB = matrix[b]
+                    changed = True
+        return changed
+
+    def _orOpt(self, tour, deadline):
+        """
+        Moves segments of one to three dots (possibly reversed) to a cheaper
+        place in the tour; returns whether anything changed.
+        """
+        matrix = self.matrix
+        changed = False
+        for length in (1, 2, 3):
+            i = 1
+            while i + length <= len(tour):
+                if time.time() > deadline: return changed
+                segment = tour[i:i + length]
+                first, final = segment[0], segment[-1]
+                p = tour[i - 1]
+                if i + length < len(tour):
+                    q = tour[i + length]
+                    gain = matrix[p][first] + matrix[final][q] - matrix[p][q]
+                else:
+                    gain = matrix[p][first]
+                rest = tour[:i] + tour[i + length:]
+                best, bestK, bestReversed = 0, None, False
+                for k in range(len(rest)):
+                    x = rest[k]
+                    if k + 1 < len(rest):
+                        y = rest[k + 1]
+                        forward = matrix[x][first] + matrix[final][y] - matrix[x][y]
+                        backward = matrix[x][final] + matrix[first][y] - matrix[x][y]
+                    else:
+                        forward, backward = matrix[x][first], matrix[x][final]
+                    if gain - forward > best:
+                        best, bestK, bestReversed = gain - forward, k, False
+                    if gain - backward > best:
+                        best, bestK, bestReversed = gain - backward, k, True
+                if bestK != None:
+                    if bestReversed: segment.reverse()
+                    tour[:] = rest[:bestK + 1] + segment + rest[bestK + 1:]
+                    changed = True
+                else:
+                    i += 1
+        return changed
+
+    def actionsForTour(self, tour):
+        """
+        The moves that visit the dots in tour order, skipping dots that were
+        already eaten while walking to earlier ones.
+        """
+        actions = []
+        eaten = set()
+        cell = self.cells[0]
+        for node in tour[1:]:
+            if self.cells[node] in eaten: continue
+            dist = self.distances[node]
+            while dist[cell] > 0:
+                for nextCell, direction in self.neighbors[cell]:
+                    if dist[nextCell] == dist[cell] - 1:
+                        actions.append(direction)
+                        cell = nextCell
+                        eaten.add(cell)
+                        break
+        return actions
+
 class ApproximateSearchAgent(Agent):
-    "Implement your contest entry here.  Change anything but the class name."
+    """
+    Eats all of the food by following the best tour a FoodTourPlanner can find
+    within timeLimit seconds of wall-clock time.
+
+    > python pacman.py -l bigSearch -p ApproximateSearchAgent -a timeLimit=2 -z .5
+    """
+
+    def __init__(self, timeLimit=3.0, verbose=False):
+        Agent.__init__(self)
+        self.timeLimit = float(timeLimit)
+        self.verbose = str(verbose) == 'True'
 
     def registerInitialState(self, state):
         "This method is called before any moves are made."
-        "*** YOUR CODE HERE ***"
+        starttime = time.time()
+        deadline = starttime + self.timeLimit
+        planner = FoodTourPlanner(state.getWalls(), state.getPacmanPosition(), state.getFood())
+        bestCost, bestTour = None, None
+        for cost, tour in planner.improvedTours(deadline):
+            if bestCost == None or cost < bestCost:
+                bestCost, bestTour = cost, tour
+                if self.verbose:
+                    print '[ApproximateSearchAgent] tour of cost %d after %.2f seconds' % (cost, time.time() - starttime)
+        self.actions = planner.actionsForTour(bestTour)
+        self.actionIndex = 0
+        print 'Path found with cost %d in %.1f seconds' % (len(self.actions), time.time() - starttime)
 
     def getAction(self, state):
         """
@@ -609,8 +1294,185 @@ class ApproximateSearchAgent(Agent):
         The Agent will receive a GameState and must return an action from
         Directions.{North, South, East, West, Stop}
         """
-        "*** YOUR CODE HERE ***"
-        util.raiseNotDefined()
+        i = self.actionIndex
+        self.actionIndex += 1
+        if i < len(self.actions):
+            return self.actions[i]
+        else:
+            return Directions.STOP
+
+class PackedFoodModel:
+    """
+    A compact copy of the parts of a GameState that matter for eating food:
+    the walls as a bitboard, the remaining food as a bitmask and Pacman's
+    cell, all using cell numbers x * height + y.  Moving in the model is a
+    few integer operations, with no legality checks, GameStateData copies or
+    GameState.explored bookkeeping.
+    """
+    def __init__(self, state):
+        walls = state.getWalls()
+        self.height = walls.height
+        self.walls = self._mask(walls.asList())
+        self.steps = ((1, Directions.NORTH), (-1, Directions.SOUTH),
+                      (self.height, Directions.EAST), (-self.height, Directions.WEST))
+        self.sync(state)
+
+    def _mask(self, positions):
+        mask = 0
+        for x, y in positions:
+            mask |= 1 << (x * self.height + y)
+        return mask
+
+    def sync(self, state):
+        "Reloads the food and Pacman's cell from a real GameState."
+        x, y = state.getPacmanPosition()
+        self.pacman = x * self.height + y
+        self.food = self._mask(state.getFood().asList())
+
+    def matches(self, state):
+        "Whether the real state still agrees with the model on Pacman's cell and the food count."
+        x, y = state.getPacmanPosition()
+        return self.pacman == x * self.height + y and state.getNumFood() == self.numFood()
+
+    def numFood(self):
+        return bin(self.food).count('1')
+
+    def move(self, action):
+        "Applies one of Pacman's moves to the model, eating any food on the new cell."
+        for delta, direction in self.steps:
+            if direction == action:
+                self.pacman += delta
+                self.food &= ~(1 << self.pacman)
+                return
+
+    def nearestFood(self, cell, food, limit):
+        """
+        Breadth-first search from cell through open cells.  Returns up to limit
+        (distance, cell, actions) triples for the closest cells in food.  The
+        search does not pass through food, so each path eats exactly one dot.
+        """
+        walls, steps = self.walls, self.steps
+        parent = {cell: None}
+        frontier, found, d = [cell], [], 0
+        while frontier and len(found) < limit:
+            d += 1
+            nextFrontier = []
+            for c in frontier:
+                for delta, direction in steps:
+                    n = c + delta
+                    if n in parent or (walls >> n) & 1: continue
+                    parent[n] = (c, direction)
+                    if (food >> n) & 1:
+                        if len(found) < limit: found.append((d, n))
+                    else:
+                        nextFrontier.append(n)
+            frontier = nextFrontier
+        results = []
+        for d, target in found:
+            actions = []
+            c = target
+            while parent[c] != None:
+                c, direction = parent[c]
+                actions.append(direction)
+            actions.reverse()
+            results.append((d, target, actions))
+        return results
+
+    def farthestFood(self, cell, food):
+        "The maze distance from cell to the farthest cell in food."
+        walls, steps = self.walls, self.steps
+        seen = set([cell])
+        frontier, d, farthest = [cell], 0, 0
+        food &= ~(1 << cell)
+        while frontier and food:
+            d += 1
+            nextFrontier = []
+            for c in frontier:
+                for delta, direction in steps:
+                    n = c + delta
+                    if n in seen or (walls >> n) & 1: continue
+                    seen.add(n)
+                    nextFrontier.append(n)
+                    if (food >> n) & 1:
+                        food &= ~(1 << n)
+                        farthest = d
+            frontier = nextFrontier
+        return farthest
+
+    def eatAlong(self, cell, food, actions):
+        "The food mask left after walking actions from cell."
+        deltas = dict([(direction, delta) for delta, direction in self.steps])
+        for action in actions:
+            cell += deltas[action]
+            food &= ~(1 << cell)
+        return food
+
+class LookaheadFoodAgent(Agent):
+    """
+    Eats all of the food by planning in a PackedFoodModel built once from the
+    starting state.  Each leg goes to a nearest dot; ties among the breadth
+    nearest dots are broken by looking depth legs ahead and bounding the rest
+    of the tour by the distance to the farthest remaining dot.  The model is
+    only re-synced with the real GameState (and the rest of the tour
+    re-planned) when they diverge.
+
+    > python pacman.py -l bigSearch -p LookaheadFoodAgent -a depth=1,breadth=3 -z .5
+    """
+    def __init__(self, depth=1, breadth=3):
+        Agent.__init__(self)
+        self.depth = int(depth)
+        self.breadth = int(breadth)
+
+    def registerInitialState(self, state):
+        starttime = time.time()
+        self.model = PackedFoodModel(state)
+        self.resyncs = 0
+        self.actions = self.plan()
+        self.actionIndex = 0
+        print 'Path found with cost %d in %.1f seconds' % (len(self.actions), time.time() - starttime)
+
+    def plan(self):
+        "The actions that eat every reachable dot, starting from the model's current state."
+        model = self.model
+        cell, food = model.pacman, model.food & ~(1 << model.pacman)
+        actions = []
+        while food:
+            cost, leg = self._lookahead(cell, food, self.depth)
+            if leg == None:
+                print 'Warning: some food cannot be reached'
+                break
+            d, target, path = leg
+            food = model.eatAlong(cell, food, path)
+            cell = target
+            actions += path
+        return actions
+
+    def _lookahead(self, cell, food, depth):
+        "The (cost, leg) of the best first leg when looking depth legs ahead."
+        if not food: return 0, None
+        if depth == 0: return self.model.farthestFood(cell, food), None
+        best, bestLeg = None, None
+        for leg in self.model.nearestFood(cell, food, self.breadth):
+            d, target, path = leg
+            rest = self._lookahead(target, self.model.eatAlong(cell, food, path), depth - 1)[0]
+            if best == None or (d, d + rest) < (bestLeg[0], best):
+                best, bestLeg = d + rest, leg
+        if best == None: return 0, None
+        return best, bestLeg
+
+    def getAction(self, state):
+        if not self.model.matches(state):
+            self.resyncs += 1
+            self.model.sync(state)
+            self.actions = self.plan()
+            self.actionIndex = 0
+        i = self.actionIndex
+        self.actionIndex += 1
+        if i < len(self.actions):
+            self.model.move(self.actions[i])
+            return self.actions[i]
+        else:
+            return Directions.STOP
 
 def mazeDistance(point1, point2, gameState):
     """
@@ -629,3 +1491,14 @@ def mazeDistance(point1, point2, gameState):
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
     prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
     return len(search.bfs(prob))
+
+def mazeDistances(sources, targets, gameState):
+    """
+    The maze distances from every source point (rows) to every target point
+    (columns), answered with shared breadth first sweeps instead of one search
+    per pair.  See MazeGraph.distances; the result is a NumPy array when NumPy
+    is installed.
+
+    Example usage: mazeDistances([gameState.getPacmanPosition()], gameState.getFood().asList(), gameState)
+    """
+    return mazeGraph.getMazeGraph(gameState.getWalls()).distances(sources, targets)
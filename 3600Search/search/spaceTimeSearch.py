@@ -0,0 +1,203 @@
+# spaceTimeSearch.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to
+# http://inst.eecs.berkeley.edu/~cs188/pacman/pacman.html
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Ghost-aware path planning by search over (position, time) states.
+
+predictGhostOccupancy() rolls each ghost's getDistribution forward a few
+moves to estimate, for every time step, the probability that a ghost is on
+each square.  A ReservationTable turns those estimates into blocked
+(position, time) slots and per-slot risks, and SpaceTimeSearchProblem
+searches over (position, time) states in which Pacman may also wait, so a
+plan can let a ghost pass before going through a corridor.
+
+Past the prediction horizon the time component is dropped and the search
+becomes an ordinary maze search, which keeps the state space small enough
+to replan on every move (see SpaceTimeSearchAgent in searchAgents.py).
+"""
+import heapq
+import search
+import mazeGraph
+from game import Directions, Actions, Configuration
+from mazeGraph import INFINITY
+from util import nearestPoint
+
+def predictGhostOccupancy(state, ghostModels, horizon, deterministic=False, minProbability=0.001):
+    """
+    Returns a list of horizon + 1 dictionaries; occupancy[t] maps a position to
+    the probability that some dangerous ghost is there after t rounds of moves.
+
+    ghostModels[i] is a GhostAgent standing in for the ghost with agent index
+    i + 1.  With deterministic=True each ghost only follows its most likely
+    action.  Scared ghosts are harmless until their timer runs out; after
+    that they are modelled as moving at full speed from the nearest square,
+    which can only overestimate how far they get.
+    """
+    occupancy = [{} for t in range(horizon + 1)]
+    probe = state.__class__(state)
+    for index in range(1, state.getNumAgents()):
+        model = ghostModels[index - 1]
+        ghostState = state.getGhostState(index)
+        beliefs = {(nearestPoint(ghostState.configuration.pos), ghostState.configuration.direction): 1.0}
+        distributions = {}
+        for t in range(horizon + 1):
+            if t >= ghostState.scaredTimer:
+                here = {}
+                for (position, direction), p in beliefs.items():
+                    here[position] = here.get(position, 0.0) + p
+                for position, p in here.items():
+                    occupancy[t][position] = 1 - (1 - occupancy[t].get(position, 0.0)) * (1 - min(p, 1.0))
+            if t == horizon: break
+            nextBeliefs = {}
+            for configuration, p in beliefs.items():
+                if configuration not in distributions:
+                    distributions[configuration] = _ghostDistribution(probe, index, model, configuration, deterministic)
+                for action, q in distributions[configuration]:
+                    key = (Actions.getSuccessor(configuration[0], action), action)
+                    nextBeliefs[key] = nextBeliefs.get(key, 0.0) + p * q
+            beliefs = dict([(key, p) for key, p in nextBeliefs.items() if p >= minProbability])
+    return occupancy
+
+def _ghostDistribution(probe, index, model, configuration, deterministic):
+    "The (action, probability) pairs model gives for its ghost at configuration."
+    agentState = probe.data.writableAgentState(index)
+    agentState.configuration = Configuration(configuration[0], configuration[1])
+    agentState.scaredTimer = 0
+    distribution = [(action, p) for action, p in model.getDistribution(probe).items() if p > 0]
+    if deterministic and distribution:
+        distribution = [(max(distribution, key=lambda pair: pair[1])[0], 1.0)]
+    return [(action, p) for action, p in distribution if action != Directions.STOP]
+
+class ReservationTable:
+    """
+    The (position, time) slots the ghosts are predicted to hold.  Slots with an
+    occupancy probability of at least blockThreshold are reserved, and the
+    search never enters them; the rest keep their probability as a risk.
+    Times past the horizon are never reserved.
+    """
+    def __init__(self, occupancy, blockThreshold=0.5):
+        self.horizon = len(occupancy) - 1
+        self.occupancy = occupancy
+        self.reserved = set()
+        for t in range(len(occupancy)):
+            for position, p in occupancy[t].items():
+                if p >= blockThreshold: self.reserved.add((position, t))
+
+    def isReserved(self, position, t):
+        return (position, t) in self.reserved
+
+    def risk(self, position, t):
+        if t > self.horizon: return 0.0
+        return self.occupancy[t].get(position, 0.0)
+
+    def stepRisk(self, position, t):
+        """
+        The risk of Pacman stepping onto position during round t: a ghost is
+        there before it moves (time t) or moves there right after (time t+1).
+        Returns None if either slot is reserved.
+        """
+        if self.isReserved(position, t) or self.isReserved(position, t + 1): return None
+        return 1 - (1 - self.risk(position, t)) * (1 - self.risk(position, t + 1))
+
+class SpaceTimeSearchProblem(search.SearchProblem):
+    """
+    A search for any of the goal positions in which a state is ((x, y), t).
+    Pacman may move or wait (STOP); each step costs 1 plus riskWeight times
+    the chance of meeting a ghost, and reserved slots are skipped.  Once t
+    reaches the reservation horizon it stays there, so later states are
+    plain positions.
+    """
+    def __init__(self, gameState, goals, reservations, riskWeight=20):
+        self.walls = gameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
+        self.startState = (gameState.getPacmanPosition(), 0)
+        self.goals = set(goals)
+        self.reservations = reservations
+        self.riskWeight = riskWeight
+        self.goalDistances = self.graph.multiSourceDistances([self.graph.cell(goal) for goal in self.goals])[0]
+        self._expanded = 0
+
+    def getStartState(self):
+        return self.startState
+
+    def isGoalState(self, state):
+        return state[0] in self.goals
+
+    def getSuccessors(self, state):
+        position, t = state
+        self._expanded += 1
+        horizon = self.reservations.horizon
+        nextT = min(t + 1, horizon)
+        successors = []
+        for nextPosition, action in self.graph.moves[self.graph.cell(position)] + ((position, Directions.STOP),):
+            if t >= horizon:
+                risk = 0.0
+            else:
+                risk = self.reservations.stepRisk(nextPosition, t)
+                if risk == None: continue
+            successors.append(((nextPosition, nextT), action, 1 + self.riskWeight * risk))
+        return successors
+
+    def getCostOfActions(self, actions):
+        if actions == None: return 999999
+        state = self.startState
+        cost = 0
+        for action in actions:
+            for nextState, successorAction, stepCost in self.getSuccessors(state):
+                if successorAction == action:
+                    state, cost = nextState, cost + stepCost
+                    break
+            else:
+                return 999999
+        return cost
+
+    def safestAction(self):
+        "The first step with the least risk, for when no plan to a goal exists."
+        successors = self.getSuccessors(self.startState)
+        if not successors: return Directions.STOP
+        best = min(successors, key=lambda successor: (successor[2], successor[1] == Directions.STOP))
+        return best[1]
+
+def spaceTimeHeuristic(state, problem):
+    "The maze distance to the nearest goal, ignoring ghosts."
+    return problem.goalDistances[problem.graph.cell(state[0])]
+
+def spaceTimeAStar(problem, heuristic=spaceTimeHeuristic, maxExpansions=5000):
+    """
+    A* over a SpaceTimeSearchProblem.  Returns the list of actions to the
+    cheapest goal, or None if none is found within maxExpansions.
+    """
+    start = problem.getStartState()
+    best = {start: 0}
+    parent = {start: None}
+    heap = [(heuristic(start, problem), 0, start)]
+    while heap and problem._expanded < maxExpansions:
+        f, g, state = heapq.heappop(heap)
+        if g > best[state]: continue
+        if problem.isGoalState(state):
+            actions = []
+            while parent[state] != None:
+                state, action = parent[state]
+                actions.append(action)
+            actions.reverse()
+            return actions
+        for nextState, action, cost in problem.getSuccessors(state):
+            h = heuristic(nextState, problem)
+            if h >= INFINITY: continue
+            if g + cost < best.get(nextState, INFINITY):
+                best[nextState] = g + cost
+                parent[nextState] = (state, action)
+                heapq.heappush(heap, (g + cost + h, g + cost, nextState))
+    return None